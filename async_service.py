@@ -0,0 +1,190 @@
+"""
+Use asyncio to create an autocomplete service holding many concurrent connections
+
+Serves the endpoints of service_with_flask over HTTP/1.1 keep-alive connections on one event loop.
+Redis is accessed with an asyncio client, trie and spelling work runs in a bounded executor,
+and requests are answered with 503 when too much work is already queued.
+
+To use:
+    run py async_service.py
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+from urllib.parse import urlsplit, parse_qs
+
+from src.cursor import CursorSessions
+from src.singleflight import AsyncSingleFlight
+from src.personalization import UserOverlays
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class ServiceOverloaded(Exception):
+    pass
+
+
+class AsyncAutocompleteService:
+    """Autocomplete endpoints on an asyncio event loop
+
+    The server is not thread-safe, so all its work runs in one executor. With the default single
+    worker, searches are serialized while the event loop keeps accepting and answering cached requests.
+    """
+
+    def __init__(self, server, redis_mgr, *, max_workers: int = 1, max_pending: int = 64,
+                 max_sessions: int = 10000, user_overlays: UserOverlays = None):
+        """
+        :param server: Server
+        :param redis_mgr: AsyncRedisManager
+        :param max_workers: number of executor threads running server work
+        :param max_pending: maximum number of server calls queued or running, more are rejected with 503
+        :param max_sessions: maximum number of cursor sessions kept
+        :param user_overlays: per-user history merged into results of requests with a user parameter
+        """
+        if max_pending < 1:
+            raise ValueError('Number of pending calls should be at least 1')
+        self.server = server
+        self.redis_mgr = redis_mgr
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='autocomplete')
+        self.cursor_sessions = CursorSessions(server, max_sessions=max_sessions)
+        # concurrent cache misses of one term share a single search
+        self.search_flight = AsyncSingleFlight()
+        self.user_overlays = UserOverlays() if user_overlays is None else user_overlays
+
+    async def run_in_executor(self, fn, *args):
+        """
+        Run server work off the event loop.
+        :raise ServiceOverloaded: if max_pending calls are already queued or running
+        """
+        if self.pending >= self.max_pending:
+            raise ServiceOverloaded()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def autocomplete(self, term: str, user=None) -> list:
+        # make no distinction between empty string and a string of all spaces
+        term = term.strip()
+
+        await self.redis_mgr.cache_search_history(term)
+
+        # check autocomplete results from Redis first
+        search_result = await self.redis_mgr.get_search_results(term)
+        if not search_result:
+            logging.debug("did not find result in cache")
+            search_result = await self.search_flight.do(term, self._search_and_cache, term)
+
+        if user is not None:
+            search_result = self.user_overlays.merge(user, term, search_result, self.server.num_res_return,
+                                                     self.server._is_deleted)
+            self.user_overlays.record(user, term)
+        return search_result
+
+    async def _search_and_cache(self, term: str) -> list:
+        search_result = await self.run_in_executor(self.server.search, term)
+        await self.redis_mgr.cache_search_results(term, search_result)
+        return search_result
+
+    async def route(self, method: str, target: str):
+        """
+        Answer one request.
+        :return: (int, dict), status code and JSON body
+        """
+        if method != 'GET':
+            return 405, {"error": "only GET is supported"}
+        url = urlsplit(target)
+        params = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        try:
+            if url.path == '/search':
+                if params.get('term') is None:
+                    return 200, {"result": list()}
+                return 200, {"results": await self.autocomplete(params['term'], params.get('user'))}
+            if url.path == '/history':
+                return 200, {"result": await self.redis_mgr.get_search_history()}
+            if url.path == '/cursor':
+                if params.get('session') is None or params.get('term') is None:
+                    return 200, {"results": list()}
+                results = await self.run_in_executor(self.cursor_sessions.update, params['session'], params['term'])
+                return 200, {"results": results}
+        except ServiceOverloaded:
+            return 503, {"error": "too many pending requests"}
+        except Exception:
+            # answer the request instead of dropping the connection
+            logging.exception("failed to answer %s", target)
+            return 500, {"error": "internal server error"}
+        return 404, {"error": "not found"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, body = 400, {"error": "malformed request line"}
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    connection = headers.get('connection', '').lower()
+                    # HTTP/1.1 keeps connections open unless asked not to, HTTP/1.0 only if asked to
+                    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                    status, body = await self.route(method, target)
+
+                payload = json.dumps(body).encode('utf-8')
+                head = [f"HTTP/1.1 {status} {_REASONS[status]}",
+                        "Content-Type: application/json",
+                        f"Content-Length: {len(payload)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                if status == 503:
+                    head.append("Retry-After: 1")
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080, backlog: int = 4096):
+        """
+        Start listening.
+        :return: asyncio.Server
+        """
+        return await asyncio.start_server(self.handle_connection, host, port, backlog=backlog)
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
+        await self.redis_mgr.close()
+
+
+async def main(host: str = '127.0.0.1', port: int = 8080):
+    from src.server import Server
+    from iomanagers.async_redis_manager import AsyncRedisManager
+
+    service = AsyncAutocompleteService(Server(connect_to_db=False),
+                                       AsyncRedisManager("localhost", 6379, 0))
+    listener = await service.start(host, port)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await service.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""
+    Async Redis manager performs the IO operations of RedisManager with an asyncio Redis client
+    sharing a connection pool, so waiting on Redis does not block the event loop.
+"""
+import redis.asyncio as aioredis
+
+
+class AsyncRedisManager:
+    def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379, db_idx: int = 0,
+                 max_connections: int = 100, client=None):
+        """
+        :param max_connections: size of the connection pool
+        :param client: asyncio Redis client to use instead of connecting to redis_host, e.g. an AsyncInMemoryRedis
+        """
+        if client is None:
+            pool = aioredis.ConnectionPool(host=redis_host, port=redis_port, db=db_idx,
+                                           max_connections=max_connections, decode_responses=True)
+            client = aioredis.Redis(connection_pool=pool)
+        self.client = client
+        self.key_expiration_time = 3600
+        self.search_history_max_length = 10
+
+    async def cache_search_results(self, search_term: str, search_results: list) -> None:
+        if search_results is None or len(search_results) == 0:
+            return
+        redis_key = "search_term:" + search_term
+        # replace the cached list in one transaction so concurrent writers never append duplicates
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(redis_key)
+            pipe.rpush(redis_key, *search_results)
+            pipe.expire(redis_key, self.key_expiration_time)
+            await pipe.execute()
+
+    async def get_search_results(self, search_term: str) -> list:
+        redis_key = "search_term:" + search_term
+        return await self.client.lrange(redis_key, 0, -1)
+
+    async def cache_search_history(self, search_term: str) -> None:
+        search_history_redis_key = "search_history"
+        await self.client.lpush(search_history_redis_key, search_term)
+        await self.client.ltrim(search_history_redis_key, 0, self.search_history_max_length - 1)
+
+    async def get_search_history(self) -> list:
+        return await self.client.lrange("search_history", 0, -1)
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,184 @@
+"""
+    In-process stand-in for a Redis server.
+
+    Implements the list and expiry commands used by RedisManager, so the service can be run
+    and load tested without a Redis server. Keyspace hits and misses are counted like the
+    stats section of Redis INFO, and pipelines run their commands atomically like MULTI/EXEC.
+"""
+import threading
+import time
+
+
+class InMemoryRedis:
+    def __init__(self):
+        self._lists = {}
+        self._expire_at = {}
+        self._lock = threading.RLock()
+        self.keyspace_hits = 0
+        self.keyspace_misses = 0
+
+    def _get(self, key):
+        """Return the list stored at key, dropping it if expired. Caller holds the lock."""
+        expire_at = self._expire_at.get(key)
+        if expire_at is not None and expire_at <= time.monotonic():
+            self._lists.pop(key, None)
+            self._expire_at.pop(key, None)
+        return self._lists.get(key)
+
+    def rpush(self, key, *values):
+        with self._lock:
+            values_list = self._get(key)
+            if values_list is None:
+                values_list = self._lists[key] = []
+            values_list.extend(values)
+            return len(values_list)
+
+    def lpush(self, key, *values):
+        with self._lock:
+            values_list = self._get(key)
+            if values_list is None:
+                values_list = self._lists[key] = []
+            for value in values:
+                values_list.insert(0, value)
+            return len(values_list)
+
+    def rpop(self, key):
+        with self._lock:
+            values_list = self._get(key)
+            if not values_list:
+                return None
+            value = values_list.pop()
+            if not values_list:
+                del self._lists[key]
+                self._expire_at.pop(key, None)
+            return value
+
+    def llen(self, key):
+        with self._lock:
+            values_list = self._get(key)
+            return len(values_list) if values_list else 0
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            values_list = self._get(key)
+            if values_list is None:
+                self.keyspace_misses += 1
+                return []
+            self.keyspace_hits += 1
+            # Redis ranges include the end index
+            end = len(values_list) + end + 1 if end < 0 else end + 1
+            return list(values_list[start:end])
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            values_list = self._get(key)
+            if values_list is None:
+                return True
+            end = len(values_list) + end + 1 if end < 0 else end + 1
+            del values_list[end:]
+            del values_list[:start]
+            if not values_list:
+                del self._lists[key]
+                self._expire_at.pop(key, None)
+            return True
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if self._get(key) is None:
+                return False
+            self._expire_at[key] = time.monotonic() + seconds
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                if self._get(key) is not None:
+                    del self._lists[key]
+                    deleted += 1
+                self._expire_at.pop(key, None)
+            return deleted
+
+    def flushdb(self):
+        with self._lock:
+            self._lists.clear()
+            self._expire_at.clear()
+            return True
+
+    def info(self, section=None):
+        return {'keyspace_hits': self.keyspace_hits, 'keyspace_misses': self.keyspace_misses}
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    """Buffers commands and runs them under the client lock on execute()"""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            res = [method(*args, **kwargs) for method, args, kwargs in self._commands]
+        self._commands = []
+        return res
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._commands = []
+
+
+class AsyncInMemoryRedis:
+    """asyncio interface of InMemoryRedis, used in place of redis.asyncio.Redis"""
+
+    def __init__(self, client: InMemoryRedis = None):
+        self.client = InMemoryRedis() if client is None else client
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        async def command(*args, **kwargs):
+            return method(*args, **kwargs)
+        return command
+
+    def pipeline(self, transaction=True):
+        return AsyncInMemoryPipeline(self.client.pipeline(transaction))
+
+    async def aclose(self):
+        return None
+
+
+class AsyncInMemoryPipeline:
+    """asyncio interface of InMemoryPipeline, commands are buffered and execute() is awaited"""
+
+    def __init__(self, pipeline: InMemoryPipeline):
+        self._pipeline = pipeline
+
+    def __getattr__(self, name):
+        queue = getattr(self._pipeline, name)
+
+        def command(*args, **kwargs):
+            queue(*args, **kwargs)
+            return self
+        return command
+
+    async def execute(self):
+        return self._pipeline.execute()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._pipeline.__exit__(*exc)
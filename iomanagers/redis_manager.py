@@ -6,9 +6,14 @@ import redis
 
 
 class RedisManager:
-    def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379, db_idx: int = 0):
-        # decode_responses equals True makes sure the response is composed of strings instead of bytes
-        self.client = redis.Redis(redis_host, redis_port, db_idx, decode_responses=True)
+    def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379, db_idx: int = 0, client=None):
+        """
+        :param client: Redis client to use instead of connecting to redis_host, e.g. an InMemoryRedis
+        """
+        if client is None:
+            # decode_responses equals True makes sure the response is composed of strings instead of bytes
+            client = redis.Redis(redis_host, redis_port, db_idx, decode_responses=True)
+        self.client = client
         self.key_expiration_time = 3600
         self.search_history_max_length = 10
 
@@ -16,8 +21,12 @@ class RedisManager:
         if search_results is None or len(search_results) == 0:
             return
         redis_key = "search_term:" + search_term
-        self.client.rpush(redis_key, *search_results)
-        self.client.expire(redis_key, self.key_expiration_time)
+        # replace the cached list in one transaction so concurrent writers never append duplicates
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(redis_key)
+            pipe.rpush(redis_key, *search_results)
+            pipe.expire(redis_key, self.key_expiration_time)
+            pipe.execute()
 
     def get_search_results(self, search_term: str) -> list:
         redis_key = "search_term:" + search_term
@@ -0,0 +1,196 @@
+"""
+Load test the Flask autocomplete service
+
+Replays a query log or a synthetic keystroke-by-keystroke Zipfian stream against /search
+at a target rate and reports throughput, latency percentiles and cache hit ratio.
+Without --url the service is started in-process with an in-memory Redis stand-in.
+
+To use:
+    py load_test.py --requests 2000 --rate 200
+    py load_test.py --log queries.jsonl --field term --keystrokes
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import json
+import math
+import random
+import threading
+import time
+from urllib.parse import quote
+from urllib.request import urlopen
+
+
+def load_query_log(file, field='term', keystrokes=False):
+    """
+    Read queries from a JSON lines file.
+    :param file: path to file with one JSON object per line
+    :param field: key of the query in each object
+    :param keystrokes: True if each query is expanded into the prefixes typed before it
+    :return: List[str]
+    """
+    queries = []
+    with open(file) as log:
+        for line in log:
+            line = line.strip()
+            if line:
+                queries.append(json.loads(line)[field])
+    return expand_keystrokes(queries) if keystrokes else queries
+
+
+def expand_keystrokes(queries):
+    return [query[:end] for query in queries for end in range(1, len(query) + 1)]
+
+
+def zipf_keystrokes(num_requests, words_file='data/5000_most_freq_words.csv', exponent=1.0, seed=0):
+    """
+    Synthetic keystroke stream: words drawn with Zipfian frequency by rank, each typed one character at a time.
+    :param num_requests: number of requests in the stream
+    :param words_file: CSV file of words in rank order
+    :param exponent: Zipf exponent
+    :param seed: random seed
+    :return: List[str]
+    """
+    with open(words_file) as csv_file:
+        words = [row[2] for row in csv.reader(csv_file)]
+    weights = [1 / rank ** exponent for rank in range(1, len(words) + 1)]
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < num_requests:
+        word = rng.choices(words, weights)[0]
+        queries.extend(expand_keystrokes([word]))
+    return queries[:num_requests]
+
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile.
+    :param sorted_values: List[float] sorted ascending
+    :param p: percentile in (0, 100]
+    :return: float
+    """
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def run_load(url, queries, rate=0.0, concurrency=4):
+    """
+    Send one /search request per query.
+    :param url: base URL of the service
+    :param queries: List[str]
+    :param rate: target requests per second, 0 sends as fast as the workers allow
+    :param concurrency: number of worker threads
+    :return: dict with number of requests, errors, elapsed seconds and sorted latencies in seconds
+    """
+    # latency is measured from the scheduled send time, so time spent queued behind slow requests
+    # is counted instead of hidden by coordinated omission
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def request(term, scheduled):
+        nonlocal errors
+        try:
+            with urlopen(f"{url}/search?term={quote(term)}") as response:
+                response.read()
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - scheduled)
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i, term in enumerate(queries):
+            if rate > 0:
+                scheduled = begin + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+            executor.submit(request, term, scheduled)
+    elapsed = time.perf_counter() - begin
+    return {'requests': len(queries), 'errors': errors, 'elapsed': elapsed, 'latencies': sorted(latencies)}
+
+
+def start_local_service():
+    """
+    Start service_with_flask on a free local port with an in-memory Redis.
+    :return: (str, InMemoryRedis, werkzeug server), base URL, Redis stand-in and server to shut down
+    """
+    from werkzeug.serving import make_server
+    from iomanagers.memory_redis import InMemoryRedis
+    from iomanagers.redis_manager import RedisManager
+    import service_with_flask
+
+    redis_client = InMemoryRedis()
+    service_with_flask.redis_mgr = RedisManager(client=redis_client)
+    http_server = make_server('127.0.0.1', 0, service_with_flask.app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{http_server.server_port}", redis_client, http_server
+
+
+def report(stats, redis_client=None):
+    """
+    Summarize a load run.
+    :param stats: result of run_load()
+    :param redis_client: client with Redis INFO stats, None if the cache is not observable
+    :return: dict
+    """
+    latencies = stats['latencies']
+    res = {
+        'requests': stats['requests'],
+        'errors': stats['errors'],
+        'throughput': len(latencies) / stats['elapsed'] if stats['elapsed'] else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'cache_hit_ratio': None,
+    }
+    if redis_client is not None:
+        info = redis_client.info('stats')
+        lookups = info['keyspace_hits'] + info['keyspace_misses']
+        res['cache_hit_ratio'] = info['keyspace_hits'] / lookups if lookups else 0.0
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the autocomplete /search endpoint.')
+    parser.add_argument('--url', help='base URL of a running service, default starts one in-process')
+    parser.add_argument('--log', help='JSON lines query log, default is a synthetic Zipfian keystroke stream')
+    parser.add_argument('--field', default='term', help='key of the query in each log line')
+    parser.add_argument('--keystrokes', action='store_true', help='replay each logged query keystroke by keystroke')
+    parser.add_argument('--requests', type=int, default=1000, help='number of synthetic requests')
+    parser.add_argument('--zipf', type=float, default=1.0, help='Zipf exponent of the synthetic stream')
+    parser.add_argument('--rate', type=float, default=0.0, help='target requests per second, 0 for unlimited')
+    parser.add_argument('--concurrency', type=int, default=4, help='number of concurrent clients')
+    args = parser.parse_args()
+
+    if args.log:
+        queries = load_query_log(args.log, field=args.field, keystrokes=args.keystrokes)
+    else:
+        queries = zipf_keystrokes(args.requests, exponent=args.zipf)
+
+    redis_client = http_server = None
+    url = args.url
+    if url is None:
+        url, redis_client, http_server = start_local_service()
+    try:
+        stats = run_load(url, queries, rate=args.rate, concurrency=args.concurrency)
+    finally:
+        if http_server is not None:
+            http_server.shutdown()
+
+    res = report(stats, redis_client)
+    print(f"requests: {res['requests']}, errors: {res['errors']}")
+    print(f"throughput: {res['throughput']:.1f} req/s")
+    print(f"latency p50: {res['p50_ms']:.2f} ms, p95: {res['p95_ms']:.2f} ms, p99: {res['p99_ms']:.2f} ms")
+    if res['cache_hit_ratio'] is not None:
+        print(f"cache hit ratio: {res['cache_hit_ratio']:.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,9 @@ To use:
 """
 
 from src.server import Server
+from src.cursor import CursorSessions
+from src.singleflight import SingleFlight
+from src.personalization import UserOverlays
 from iomanagers.redis_manager import RedisManager
 from flask import Flask, request, render_template
 import datetime
@@ -15,6 +18,10 @@ import json
 app = Flask(__name__)
 server = Server(connect_to_db=False)
 redis_mgr = RedisManager("localhost", 6379, 0)
+cursor_sessions = CursorSessions(server, max_sessions=10000)
+# concurrent cache misses of one term share a single search
+search_flight = SingleFlight()
+user_overlays = UserOverlays(max_terms_per_user=50, max_total_terms=100000)
 
 
 @app.route('/', methods=["GET"])
@@ -42,6 +49,7 @@ def history():
 def autocomplete():
     """
     define an autocomplete function as an end-point.
+    With a user parameter the user's own matching searches are placed first.
     """
     params = request.args  # parsed url args as a immutable multi-dict
     if params is None or params.get('term') is None:
@@ -60,12 +68,34 @@ def autocomplete():
 
     if not search_result:
         logging.debug("did not find result in cache")
-        search_result = server.search(term)
+        search_result = search_flight.do(term, search_and_cache, term)
 
-        redis_mgr.cache_search_results(term, search_result)
+    user = params.get('user')
+    if user is not None:
+        search_result = user_overlays.merge(user, term, search_result, server.num_res_return,
+                                            server._is_deleted)
+        user_overlays.record(user, term)
 
     return json.dumps({"results": search_result})
 
 
+def search_and_cache(term):
+    search_result = server.search(term)
+    redis_mgr.cache_search_results(term, search_result)
+    return search_result
+
+
+@app.route('/cursor', methods=["GET"])
+def cursor_search():
+    """
+    keystroke-by-keystroke suggestions, the cursor of the session moves from the previous term to the new one.
+    """
+    params = request.args
+    if params.get('session') is None or params.get('term') is None:
+        return json.dumps({"results": list()})
+
+    return json.dumps({"results": cursor_sessions.update(params.get('session'), params.get('term'))})
+
+
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=8080)
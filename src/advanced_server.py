@@ -4,13 +4,24 @@
 
 
 from . import server
-from . import spell
+from . import neighbors
+from . import loader
 from sklearn.neighbors import BallTree
 import numpy as np
-import json
+import threading
 from os import path
 
 
+def _train_ball_tree(embedding_json):
+    """
+    Load embeddings and train the k nearest neighbor model, run in a worker process.
+    :param embedding_json: path to JSON file holding the embedding matrix
+    :return: (np.ndarray, BallTree)
+    """
+    embeddings = np.array(loader.load_json(embedding_json))
+    return embeddings, BallTree(embeddings, leaf_size=10)
+
+
 class AdvTrie(server.Server):
     """This class provides advanced functionality such as providing auto-corrections as suggestions."""
     MAX_CORRECTIONS = 10
@@ -20,34 +31,81 @@ class AdvTrie(server.Server):
     def __init__(self, num_corrections=10, num_basic_results=10,
                  home_dir=".",
                  embedding_json=None,
-                 vocab_int_json=None, *args, **kwargs):
-        super().__init__(num_res_return=num_basic_results, *args, **kwargs)
-
+                 vocab_int_json=None,
+                 neighbor_table=None, *args, **kwargs):
+        """
+        :param neighbor_table: .npy file built by neighbors.save_neighbor_table(),
+            if given next words are looked up from it and no BallTree is trained
+        With concurrent_init the embedding model is loaded in the background while the base server
+        starts, and searches return no next words until embedding_ready is set.
+        """
         self.use_embedding = False
+        self.neighbor_table = None
+        self.embedding_ready = threading.Event()
+        self.embedding_error = None
+        timings = {}
 
-        if embedding_json and vocab_int_json:
-            self.use_embedding = True
-            embedding_json = path.join(home_dir, embedding_json)
-            vocab_int_json = path.join(home_dir, vocab_int_json)
-            # load json files
-            print("Loading JSON files, may take a while.")
-            with open(embedding_json, 'r') as read_file:
-                self.embeddings = np.array(json.load(read_file))
-            with open(vocab_int_json, 'r') as read_file:
-                self.vocab_int = json.load(read_file)
-            self.int_vocab = {i: word for word, i in self.vocab_int.items()}
+        if vocab_int_json and (embedding_json or neighbor_table):
+            self.__load_embedding(home_dir, embedding_json, vocab_int_json, neighbor_table,
+                                  kwargs.get('concurrent_init', False), timings)
+        else:
+            self.embedding_ready.set()
 
-            # train k nearest neighbor model
-            print("Training BallTree k-nearest neighbor searcher...")
-            self.searcher = BallTree(self.embeddings, leaf_size=10)
+        super().__init__(num_res_return=num_basic_results, *args, **kwargs)
+        timings.update(self.load_timings)
+        self.load_timings = timings
 
-        self.checker = spell.Spell()
+        # share the corpus already loaded by the base class
+        self.checker = self.spell_checker
         self.num_corrections = num_corrections
         self.num_basic_search_results = num_basic_results
         self.max_total_res = min(10, num_basic_results+num_corrections)
 
         print("Ready to use.")
 
+    def __load_embedding(self, home_dir, embedding_json, vocab_int_json, neighbor_table, concurrent, timings):
+        pipeline = loader.LoadPipeline(concurrent=concurrent, timings=timings)
+        # load json files
+        print("Loading JSON files, may take a while.")
+        vocab_int = pipeline.submit_io('vocab_int', loader.load_json, path.join(home_dir, vocab_int_json))
+        if neighbor_table:
+            model = pipeline.submit_io('neighbor_table', neighbors.load_neighbor_table,
+                                       path.join(home_dir, neighbor_table))
+        else:
+            # train k nearest neighbor model
+            print("Training BallTree k-nearest neighbor searcher...")
+            model = pipeline.submit_cpu('ball_tree', _train_ball_tree, path.join(home_dir, embedding_json))
+        pipeline.shutdown(wait=False)
+
+        def finish():
+            try:
+                self.vocab_int = vocab_int.result()
+                self.int_vocab = {i: word for word, i in self.vocab_int.items()}
+                if neighbor_table:
+                    self.neighbor_table = model.result()
+                else:
+                    self.embeddings, self.searcher = model.result()
+                self.use_embedding = True
+            except Exception as e:
+                self.embedding_error = e
+                if not concurrent:
+                    raise
+            finally:
+                self.embedding_ready.set()
+
+        if concurrent:
+            threading.Thread(target=finish, name='embedding-loader', daemon=True).start()
+        else:
+            finish()
+
+    def wait_until_ready(self, timeout=None):
+        """
+        Block until the embedding model is loaded.
+        :param timeout: seconds to wait, None waits forever
+        :return: bool, True if loading finished, check embedding_error for failures
+        """
+        return self.embedding_ready.wait(timeout)
+
     def _next_words(self, word):
         """
         Given an input return the next most relevant words contextually.
@@ -57,9 +115,13 @@ class AdvTrie(server.Server):
         if not self.use_embedding or word not in self.vocab_int:
             return []
         index = self.vocab_int[word]
-        neighbors = self.searcher.query([self.embeddings[index]], k=10, return_distance=False)
+        if self.neighbor_table is not None:
+            return [self.int_vocab[int(neighbor)] for neighbor in self.neighbor_table[index]]
+        nearest = self.searcher.query([self.embeddings[index]],
+                                      k=min(neighbors.NUM_NEIGHBORS + 1, len(self.embeddings)),
+                                      return_distance=False)
         res = []
-        for neighbor in list(neighbors.flatten()):
+        for neighbor in list(nearest.flatten()):
             res.append(self.int_vocab[neighbor])
         return res[1:]
 
@@ -67,29 +129,43 @@ class AdvTrie(server.Server):
         """
         This search method not only returns results from basic class count-based search,
         but also returns top phrases from Bayes predictions.
+        Spell candidates of the last word are computed once and every insertion of the search
+        is recorded before a single refresh of top results.
         :param search_term: same as in base class.
         :return: List[str]
         """
-        basic_results = super().search(search_term)
-        corrections = []
-        next_words = None
-        if len(search_term) > 0:
-            target = search_term.split()[-1]
-            corrections = self.checker.most_likely_replacements(target, self.num_corrections)
-            next_words = self._next_words(target)
-        self.insertLogger.debug('basic results are {}'.format(str(basic_results)))
-        corrections = [word for word in corrections if word not in basic_results]
-        next_words = [word for word in next_words if word not in basic_results and word not in corrections]
-
-        for word in corrections[:AdvTrie.NUM_CORRECTIONS_TO_INSERT]:
-            super().search(word)
-
-        self.search_count += 1
-        if self.search_count >= AdvTrie.server_update_frequency:
-            self.search_count = 0
-            self.update_top_results()
-
-        return list(set(corrections + basic_results))[:self.max_total_res] + next_words[:2]
+        if not isinstance(search_term, str):
+            raise TypeError("{} is not a string".format(search_term))
+
+        self.search_history.appendleft(search_term)
+        _words = search_term.lower().split()
+        if len(_words) == 0:
+            return []
+
+        *previous, target = _words
+        # the basic search uses the two most likely replacements, corrections use the longer list
+        replacements = self.checker.most_likely_replacements(target, max(self.num_corrections, 2))
+        corrections = [word for word in replacements[:self.num_corrections] if not self._is_deleted(word)]
+        word_lists = [self.checker.most_likely_replacements(word, num_res=2) for word in previous]
+        word_lists.append(replacements[:2])
+
+        phrases = self._replacement_phrases(word_lists)
+        # multi-word phrases go to the phrase index instead of the trie when token phrases are enabled
+        use_phrase_index = self.phrase_index is not None and previous
+        candidates = [] if use_phrase_index else self._record_phrases(phrases)
+        self._record_phrases([word for word in corrections if word not in phrases]
+                             [:AdvTrie.NUM_CORRECTIONS_TO_INSERT])
+        self._refresh_top_results(candidates)
+
+        basic_results = self._complete_phrases(phrases) if use_phrase_index else self._rank_candidates(candidates)
+        if not self.testing:
+            self.insertLogger.debug('basic results are {}'.format(str(basic_results)))
+
+        results = basic_results + [word for word in corrections if word not in basic_results]
+        results = results[:self.max_total_res]
+        next_words = [word for word in self._next_words(target)
+                      if word not in results and not self._is_deleted(word)]
+        return results + next_words[:2]
 
     @property
     def num_corrections(self):
@@ -0,0 +1,136 @@
+"""
+    Incremental prefix lookup for clients sending one keystroke at a time.
+
+    A cursor keeps the path of trie nodes matching the typed text, so a keystroke moves one node
+    down or up instead of walking the trie from the root and correcting spelling again.
+"""
+from collections import OrderedDict
+import threading
+from typing import List
+
+
+class PrefixCursor:
+    """Cursor over the trie of a server
+
+    Lookups are read-only: typed text is neither recorded nor spell-corrected.
+    If nodes are removed from the trie the cursor walks its text again on the next lookup.
+    """
+
+    def __init__(self, server):
+        """
+        :param server: Server
+        """
+        self._server = server
+        self.text = ''
+        self._path = [server._trie_root()]   # nodes of the longest prefix of text found in the trie
+        self._version = server._trie_version
+
+    def __repr__(self):
+        return f"Prefix cursor at {self.text!r}"
+
+    def advance(self, chars: str) -> List[str]:
+        """
+        Type characters at the end of the text.
+        :param chars: str
+        :return: List[str], top results of the new text
+        """
+        self.__sync()
+        self.text += chars.lower()
+        return self.results()
+
+    def backspace(self, count: int = 1) -> List[str]:
+        """
+        Delete characters at the end of the text.
+        :param count: number of characters to delete
+        :return: List[str], top results of the new text
+        """
+        self.__sync()
+        self.text = self.text[:max(len(self.text) - count, 0)]
+        del self._path[len(self.text) + 1:]
+        return self.results()
+
+    def update(self, text: str) -> List[str]:
+        """
+        Move to a new text, keeping the common prefix with the current one.
+        :param text: full text typed by the client, whitespace is normalized as in Server.search
+        :return: List[str], top results of the new text
+        """
+        text = ' '.join(text.lower().split())
+        common = 0
+        for old, new in zip(self.text, text):
+            if old != new:
+                break
+            common += 1
+        if common < len(self.text):
+            self.backspace(len(self.text) - common)
+        return self.advance(text[common:])
+
+    def reset(self):
+        self.text = ''
+        self._path = [self._server._trie_root()]
+        self._version = self._server._trie_version
+
+    def results(self) -> List[str]:
+        """
+        Top results of the current text.
+        :return: List[str]
+        """
+        self.__sync()
+        self.__extend()
+        if not self.text.strip() or len(self._path) <= len(self.text):
+            return []
+        return self._server._rank_candidates([self._path[-1]])
+
+    def __extend(self):
+        # follow the text down from the deepest node, which also finds nodes inserted after it was typed
+        while len(self._path) <= len(self.text):
+            child = self._path[-1].children.get(self.text[len(self._path) - 1])
+            if child is None:
+                break
+            self._path.append(child)
+
+    def __sync(self):
+        if self._version == self._server._trie_version:
+            return
+        text = self.text
+        self.reset()
+        self.advance(text)
+
+
+class CursorSessions:
+    """Cursors of client sessions
+
+    Holds at most max_sessions cursors, the least recently used one is evicted beyond it.
+    """
+
+    def __init__(self, server, max_sessions: int = 10000):
+        """
+        :param server: Server
+        :param max_sessions: maximum number of cursors kept
+        """
+        if max_sessions < 1:
+            raise ValueError('Number of sessions should be at least 1')
+        self.server = server
+        self.max_sessions = max_sessions
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def update(self, session_id: str, text: str) -> List[str]:
+        """
+        Move the cursor of a session to the text the client typed.
+        :param session_id: str
+        :param text: full text typed by the client
+        :return: List[str]
+        """
+        with self._lock:
+            cursor = self._cursors.get(session_id)
+            if cursor is None:
+                cursor = self._cursors[session_id] = self.server.cursor()
+                if len(self._cursors) > self.max_sessions:
+                    self._cursors.popitem(last=False)
+            else:
+                self._cursors.move_to_end(session_id)
+            return cursor.update(text)
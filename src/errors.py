@@ -9,3 +9,7 @@ class BasicValueError(ValueError):
 
 class ReturnResultValueLessThanOne(BasicValueError):
     pass
+
+
+class BeamWidthLessThanOne(BasicValueError):
+    pass
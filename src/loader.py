@@ -0,0 +1,113 @@
+"""
+    Initialization pipeline for servers.
+
+    Independent loading steps run concurrently, threads for file I/O and processes for
+    CPU-bound parsing and training, and the wall time of every step is recorded.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+import csv
+import json
+import time
+
+import yaml
+
+
+class LoadPipeline:
+    """Runs loading steps and records their timings
+
+    Without concurrency every step runs inline when submitted, so callers use the same
+    future-based code in both modes.
+
+    Attributes:
+        timings: Dict[str, float]
+            seconds taken by each step, a step is recorded when it finishes
+    """
+
+    def __init__(self, concurrent: bool = True, timings=None):
+        """
+        :param concurrent: True if steps run in background threads and processes
+        :param timings: dict to record timings in, shared between pipelines of one server
+        """
+        self.concurrent = concurrent
+        self.timings = {} if timings is None else timings
+        self._threads = None
+        self._processes = None
+
+    def submit_io(self, name: str, fn, *args) -> Future:
+        """
+        Run an I/O-bound step in a thread.
+        :param name: step name in timings
+        :return: Future of the step result
+        """
+        if self.concurrent and self._threads is None:
+            self._threads = ThreadPoolExecutor(thread_name_prefix='loader')
+        return self.__submit(self._threads, name, fn, *args)
+
+    def submit_cpu(self, name: str, fn, *args) -> Future:
+        """
+        Run a CPU-bound step in a separate process. fn, args and the result must be picklable.
+        :param name: step name in timings
+        :return: Future of the step result
+        """
+        if self.concurrent and self._processes is None:
+            self._processes = ProcessPoolExecutor()
+        return self.__submit(self._processes, name, fn, *args)
+
+    def __submit(self, executor, name, fn, *args) -> Future:
+        start = time.perf_counter()
+        if executor is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = executor.submit(fn, *args)
+
+        def record(_):
+            self.timings[name] = time.perf_counter() - start
+        future.add_done_callback(record)
+        return future
+
+    @contextmanager
+    def timed(self, name: str):
+        """
+        Record the time of a step run in the calling thread.
+        :param name: step name in timings
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def shutdown(self, wait: bool = True):
+        """
+        Release the workers. Steps already submitted still finish when wait is False.
+        :param wait: True if blocking until all steps finished
+        :return: None
+        """
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=wait)
+
+
+def load_yaml(file):
+    with open(file, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def load_json(file):
+    with open(file, 'r') as read_file:
+        return json.load(read_file)
+
+
+def read_word_frequencies(file):
+    """
+    Read words and their frequencies from the word list CSV file.
+    :param file: CSV file with rows of rank, id, word, frequency, dispersion
+    :return: List[Tuple[str, int]]
+    """
+    with open(file) as csv_file:
+        return [(word, int(freq)) for _, _, word, freq, _ in csv.reader(csv_file)]
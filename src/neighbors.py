@@ -0,0 +1,82 @@
+"""
+    Offline nearest-neighbor table for word embeddings.
+
+    The vocabulary of the embedding model is fixed, so the nearest neighbors of every word
+    can be computed once and stored as a compact integer array. AdvTrie then answers
+    next-word suggestions with an array lookup instead of a BallTree query.
+
+    To use:
+        python -m src.neighbors embeddings.json neighbors.npy
+"""
+import json
+import sys
+
+import numpy as np
+
+# number of neighbors stored per word, the word itself excluded
+NUM_NEIGHBORS = 9
+# number of rows compared against the whole vocabulary at a time
+CHUNK_SIZE = 1024
+
+
+def build_neighbor_table(embeddings, k: int = NUM_NEIGHBORS, chunk_size: int = CHUNK_SIZE):
+    """
+    Compute the k nearest neighbors (Euclidean distance) of every row of the embedding matrix.
+    Distances are computed in chunks of rows so memory stays bounded by chunk_size * vocabulary size.
+    :param embeddings: array-like of shape (num_words, dim)
+    :param k: number of neighbors per word, the word itself excluded
+    :param chunk_size: number of rows processed per chunk
+    :return: np.ndarray of shape (num_words, k), neighbor indices ordered from nearest to farthest
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    num_words = embeddings.shape[0]
+    if k < 1:
+        raise ValueError('Number of neighbors should be at least 1')
+    if chunk_size < 1:
+        raise ValueError('Chunk size should be at least 1')
+    k = min(k, num_words - 1)
+    index_type = np.int32 if num_words <= np.iinfo(np.int32).max else np.int64
+    table = np.empty((num_words, max(k, 0)), dtype=index_type)
+    if k <= 0:
+        return table
+
+    squared_norms = np.einsum('ij,ij->i', embeddings, embeddings)
+    for start in range(0, num_words, chunk_size):
+        stop = min(start + chunk_size, num_words)
+        chunk = embeddings[start:stop]
+        # squared Euclidean distance ||a||^2 + ||b||^2 - 2ab, the ordering is all that matters
+        distances = squared_norms[start:stop, None] + squared_norms[None, :] - 2.0 * (chunk @ embeddings.T)
+        rows = np.arange(stop - start)
+        distances[rows, rows + start] = np.inf
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(distances, candidates, axis=1), axis=1, kind='stable')
+        table[start:stop] = np.take_along_axis(candidates, order, axis=1)
+    return table
+
+
+def save_neighbor_table(embedding_json: str, table_file: str, k: int = NUM_NEIGHBORS,
+                        chunk_size: int = CHUNK_SIZE) -> None:
+    """
+    Build the neighbor table from an embedding JSON file and store it as a .npy file.
+    :param embedding_json: path to JSON file holding the embedding matrix
+    :param table_file: path of the .npy file to write
+    :param k: number of neighbors per word
+    :param chunk_size: number of rows processed per chunk
+    :return: None
+    """
+    with open(embedding_json, 'r') as read_file:
+        embeddings = np.array(json.load(read_file))
+    np.save(table_file, build_neighbor_table(embeddings, k=k, chunk_size=chunk_size))
+
+
+def load_neighbor_table(table_file: str):
+    """
+    Load a neighbor table built by save_neighbor_table().
+    :param table_file: path to .npy file
+    :return: np.ndarray
+    """
+    return np.load(table_file)
+
+
+if __name__ == '__main__':
+    save_neighbor_table(sys.argv[1], sys.argv[2])
@@ -0,0 +1,113 @@
+"""
+    Per-user personalization of suggestions.
+
+    Each user has a small overlay of recently searched terms with counts. Overlays are merged with
+    the global results at query time, so personal history changes the ranking without a trie per user.
+"""
+from collections import Counter, OrderedDict
+import threading
+from typing import List
+
+
+class UserOverlays:
+    """Bounded per-user search history
+
+    A user keeps at most max_terms_per_user terms, the least searched one is dropped beyond it.
+    All overlays together keep at most max_total_terms terms, the overlays of the least recently
+    active users are evicted beyond it.
+    """
+
+    def __init__(self, max_terms_per_user: int = 50, max_total_terms: int = 100000,
+                 max_personal_results: int = 3):
+        """
+        :param max_terms_per_user: maximum number of terms kept for one user
+        :param max_total_terms: maximum number of terms kept for all users
+        :param max_personal_results: maximum number of personal terms placed before global results
+        """
+        if max_terms_per_user < 1 or max_total_terms < max_terms_per_user:
+            raise ValueError('Overlay budget should hold at least one full overlay')
+        self.max_terms_per_user = max_terms_per_user
+        self.max_total_terms = max_total_terms
+        self.max_personal_results = max_personal_results
+        self._overlays = OrderedDict()     # user ID to Counter of terms, least recently active first
+        self.total_terms = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+        Return number of users with an overlay
+        :return: int
+        """
+        return len(self._overlays)
+
+    @staticmethod
+    def _normalize(term: str) -> str:
+        return ' '.join(term.lower().split())
+
+    def record(self, user_id, term: str) -> None:
+        """
+        Record a search of a user.
+        :param user_id: hashable user ID
+        :param term: str
+        :return: None
+        """
+        term = UserOverlays._normalize(term)
+        if not term:
+            return
+        with self._lock:
+            overlay = self._overlays.get(user_id)
+            if overlay is None:
+                overlay = self._overlays[user_id] = Counter()
+            else:
+                self._overlays.move_to_end(user_id)
+
+            if term not in overlay:
+                self.total_terms += 1
+            overlay[term] += 1
+            if len(overlay) > self.max_terms_per_user:
+                # drop the least searched term other than the one just recorded
+                coldest = min((t for t in overlay if t != term), key=lambda t: overlay[t])
+                del overlay[coldest]
+                self.total_terms -= 1
+
+            while self.total_terms > self.max_total_terms:
+                _, evicted = self._overlays.popitem(last=False)
+                self.total_terms -= len(evicted)
+
+    def personal_results(self, user_id, prefix: str, is_deleted=None) -> List[str]:
+        """
+        Terms of a user starting with prefix, most searched first.
+        :param user_id: hashable user ID
+        :param prefix: str
+        :param is_deleted: predicate of terms deleted or blocked on the server, None keeps every term
+        :return: List[str], at most max_personal_results terms
+        """
+        prefix = UserOverlays._normalize(prefix)
+        with self._lock:
+            overlay = self._overlays.get(user_id)
+            if not overlay or not prefix:
+                return []
+            matches = [(count, term) for term, count in overlay.items() if term.startswith(prefix)]
+        if is_deleted is not None:
+            matches = [(count, term) for count, term in matches if not is_deleted(term)]
+        matches.sort(key=lambda x: (-x[0], x[1]))
+        return [term for _, term in matches[:self.max_personal_results]]
+
+    def merge(self, user_id, prefix: str, global_results: List[str], num_results: int = 10,
+              is_deleted=None) -> List[str]:
+        """
+        Place the user's own matching terms before the global results.
+        :param user_id: hashable user ID
+        :param prefix: search term
+        :param global_results: results of the shared server
+        :param num_results: maximum number of results
+        :param is_deleted: predicate of terms deleted or blocked on the server, None keeps every term
+        :return: List[str]
+        """
+        res = self.personal_results(user_id, prefix, is_deleted)
+        for term in global_results:
+            if len(res) >= num_results:
+                break
+            if term not in res:
+                res.append(term)
+        return res[:num_results]
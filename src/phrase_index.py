@@ -0,0 +1,134 @@
+"""
+    Token-level index for multi-word searches.
+
+    Phrases are stored as sequences of interned word IDs instead of character paths in the trie.
+    A word trie completes the last, partially typed token, and an n-gram table maps the previous
+    tokens to the counts of the words that followed them.
+"""
+from collections import Counter, defaultdict
+import heapq
+from typing import List
+
+from src.trienode import TrieNode
+
+
+class PhraseIndex:
+    """Phrase completion index over interned words
+
+    Recording a phrase of n words costs O(n * order) table updates and creates trie nodes only
+    for words never seen before, however many distinct sentences contain them.
+    """
+
+    def __init__(self, order: int = 3):
+        """
+        :param order: n-gram order, a word is predicted from at most order - 1 previous words
+        """
+        if order < 2:
+            raise ValueError('n-gram order should be at least 2')
+        self.order = order
+        self.words = []         # word ID to word
+        self.word_ids = {}      # word to word ID
+        self.root = TrieNode(prefix='', is_word=False)  # top results are keyed by word ID
+        self.node_count = 1
+        self.continuations = defaultdict(Counter)   # tuple of previous word IDs to counts of next word IDs
+
+    def __repr__(self):
+        return f"Phrase index with {len(self.words)} words and {len(self.continuations)} contexts"
+
+    def __len__(self):
+        return len(self.words)
+
+    def __intern(self, word: str) -> int:
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = len(self.words)
+            self.word_ids[word] = word_id
+            self.words.append(word)
+        return word_id
+
+    def __insert_word(self, word: str, word_id: int):
+        cur = self.root
+        cur.top_results[word_id] += 1
+        for char in word:
+            if char not in cur.children:
+                self.node_count += 1
+                cur.children[char] = TrieNode(prefix=cur.prefix + char, parent=cur)
+            cur = cur.children[char]
+            cur.top_results[word_id] += 1
+        cur.isWord = True
+
+    def record(self, phrase: str):
+        """
+        Record one search of a phrase.
+        :param phrase: words separated by spaces
+        :return: None
+        """
+        ids = []
+        for word in phrase.lower().split():
+            word_id = self.__intern(word)
+            self.__insert_word(word, word_id)
+            for length in range(1, min(len(ids), self.order - 1) + 1):
+                self.continuations[tuple(ids[-length:])][word_id] += 1
+            ids.append(word_id)
+
+    def __word_node(self, partial: str):
+        cur = self.root
+        for char in partial:
+            cur = cur.children.get(char)
+            if cur is None:
+                return None
+        return cur
+
+    def next_words(self, previous: List[str], partial: str = '', num_results: int = 10) -> List[str]:
+        """
+        Most likely words following the previous words and starting with partial.
+        Backs off from the longest known context to shorter ones, then to overall word counts.
+        :param previous: words before the last token
+        :param partial: typed part of the last token, empty to predict the next word
+        :param num_results: maximum number of words
+        :return: List[str]
+        """
+        ids = []
+        for word in previous[-(self.order - 1):]:
+            word_id = self.word_ids.get(word)
+            # an unknown word breaks the context
+            ids = [] if word_id is None else ids + [word_id]
+
+        res = []
+        for length in range(len(ids), 0, -1):
+            counter = self.continuations.get(tuple(ids[-length:]))
+            if not counter:
+                continue
+            matches = ((count, word_id) for word_id, count in counter.items()
+                       if self.words[word_id].startswith(partial))
+            for _, word_id in heapq.nsmallest(num_results, matches, key=lambda x: (-x[0], x[1])):
+                if word_id not in res:
+                    res.append(word_id)
+            if len(res) >= num_results:
+                break
+
+        node = self.__word_node(partial)
+        if node is not None and len(res) < num_results:
+            for word_id, _ in node.top_results.most_common(num_results + len(res)):
+                if word_id not in res:
+                    res.append(word_id)
+        return [self.words[word_id] for word_id in res[:num_results]]
+
+    def complete(self, phrase: str, num_results: int = 10) -> List[str]:
+        """
+        Complete the last token of a phrase given the previous ones.
+        A phrase ending with a space asks for the next word.
+        :param phrase: str
+        :param num_results: maximum number of completions
+        :return: List[str], completed phrases
+        """
+        words = phrase.lower().split()
+        if not words:
+            return []
+        if phrase[-1].isspace():
+            previous, partial = words, ''
+        else:
+            previous, partial = words[:-1], words[-1]
+        head = ' '.join(previous)
+        return [f'{head} {word}' if head else word
+                for word in self.next_words(previous, partial, num_results=num_results)]
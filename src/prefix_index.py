@@ -0,0 +1,153 @@
+"""
+    Read-only suggestion engine backed by a sorted array of terms.
+
+    All terms are kept in one lexicographically sorted list with a parallel NumPy count array.
+    Terms sharing a prefix are contiguous, so a prefix maps to a range found by binary search
+    and top results are selected from the count slice with argpartition.
+
+    To benchmark against the trie server:
+        python -m src.prefix_index
+"""
+from bisect import bisect_left
+import csv
+import sys
+import timeit
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+from src.errors import ReturnResultValueLessThanOne
+
+# sorts after every character used in search terms, closes the range of a prefix
+_PREFIX_END = chr(sys.maxunicode)
+
+
+class SortedPrefixIndex:
+    """Prefix search over a sorted term array
+
+    Offers the same read API as Server, search(str) and top_results(int), for shards that
+    do not take new searches. Terms are not spell-corrected.
+    """
+
+    def __init__(self, counts: Dict[str, int], *, num_res_return: int = 10):
+        """
+        :param counts: search count of each term
+        :param num_res_return: maximum number of results to return to user
+        """
+        self.terms = sorted(counts)
+        self.counts = np.fromiter((counts[term] for term in self.terms), dtype=np.int64, count=len(self.terms))
+        self.num_res_return = num_res_return
+
+    @classmethod
+    def from_csv(cls, file='data/5000_most_freq_words.csv', **kwargs):
+        """
+        Build the index from a word frequency file in the format loaded by Server.
+        :param file: CSV file with rows of rank, id, word, frequency, dispersion
+        :return: SortedPrefixIndex
+        """
+        counts = {}
+        with open(file) as csv_file:
+            for _, _, word, freq, _ in csv.reader(csv_file):
+                counts[word] = counts.get(word, 0) + int(freq)
+        return cls(counts, **kwargs)
+
+    def __repr__(self):
+        return f"Sorted prefix index with {len(self.terms)} terms"
+
+    def __len__(self):
+        return len(self.terms)
+
+    # accessor for num_res_return
+    @property
+    def num_res_return(self):
+        return self._num_res_return
+
+    @num_res_return.setter
+    def num_res_return(self, val):
+        if val < 1:
+            raise ReturnResultValueLessThanOne('should return at least 1 result.')
+        self._num_res_return = val
+
+    def prefix_range(self, prefix: str):
+        """
+        Find the range of terms starting with prefix.
+        :param prefix: str
+        :return: (int, int), start and end indices of the range
+        """
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + _PREFIX_END, lo=start)
+        return start, end
+
+    def _top_k(self, start: int, end: int, k: int) -> List[str]:
+        if end - start > k:
+            indices = np.argpartition(-self.counts[start:end], k - 1)[:k] + start
+        else:
+            indices = np.arange(start, end)
+        # highest count first, lexicographic order among equal counts
+        indices = indices[np.lexsort((indices, -self.counts[indices]))]
+        return [self.terms[i] for i in indices]
+
+    def search(self, search_term: str) -> List[str]:
+        """
+        Return the most searched terms starting with search_term.
+        :param search_term: str
+        :return: List[str]
+        """
+        if not isinstance(search_term, str):
+            raise TypeError("{} is not a string".format(search_term))
+        prefix = ' '.join(search_term.lower().split())
+        if not prefix:
+            return []
+        start, end = self.prefix_range(prefix)
+        return self._top_k(start, end, self.num_res_return)
+
+    def top_results(self, num_results=10):
+        return self._top_k(0, len(self.terms), num_results)
+
+
+def benchmark(file='data/5000_most_freq_words.csv', number=1000):
+    """
+    Compare memory and prefix lookup latency of the trie server and the sorted prefix index.
+    :param file: word frequency CSV file
+    :param number: number of repetitions of each prefix lookup
+    :return: dict, engine name to (bytes allocated, microseconds per lookup)
+    """
+    from src.server import Server
+
+    with open(file) as csv_file:
+        rows = [(word, int(freq)) for _, _, word, freq, _ in csv.reader(csv_file)]
+    prefixes = sorted({word[:length] for word, _ in rows for length in (1, 2, 3)})
+
+    server = Server(connect_to_db=False, testing=True)
+    tracemalloc.start()
+    for word, freq in rows:
+        server._Server__insert(word, count=freq, from_db=True)
+    server.update_top_results()
+    trie_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    def trie_lookup(prefix):
+        node = server._Server__root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return server._rank_candidates([node])
+
+    # read the file again inside the traced region so the term strings are counted, as the trie prefixes are
+    tracemalloc.start()
+    index = SortedPrefixIndex.from_csv(file)
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    res = {}
+    for name, size, lookup in (('trie', trie_bytes, trie_lookup), ('sorted array', index_bytes, index.search)):
+        seconds = timeit.timeit(lambda: [lookup(prefix) for prefix in prefixes], number=number)
+        res[name] = (size, seconds / (number * len(prefixes)) * 1e6)
+    return res
+
+
+if __name__ == '__main__':
+    for engine, (num_bytes, latency) in benchmark(number=100).items():
+        print(f"{engine}: {num_bytes / 1024:.0f} KiB, {latency:.2f} us per prefix lookup")
@@ -2,19 +2,25 @@
     Main module for auto-complete server
 """
 from collections import deque, Counter
+import heapq
 import logging
 import logging.config
-import yaml
-import csv
+import math
+import sys
+import time
 from typing import List
 
 # from nltk.corpus import words as en_corpus
 # from py2neo import Node
 from src.trienode import TrieNode
 from src.spell import Spell
+from src.phrase_index import PhraseIndex
+from src import loader
+from src import snapshot
+from src.cursor import PrefixCursor
 
 from . import database
-from src.errors import ReturnResultValueLessThanOne
+from src.errors import ReturnResultValueLessThanOne, BeamWidthLessThanOne
 
 # type alias
 Word_list = List[str]
@@ -33,15 +39,37 @@ class Server:
             index for the application server created
         Server.server_update_frequency: int
             frequency for controlling how often servers write to database
+        Server.max_decay_exponent: float
+            largest exponent of the decay weight before the reference time is moved forward
+        Server.compaction_threshold: int
+            number of terms deleted in bulk before they are purged from the trie
+        Server.eviction_ratio: float
+            fraction of the node budget kept after evicting cold words
     """
 
     server_index = 0
     server_update_frequency = 1
+    max_decay_exponent = 30.0
+    compaction_threshold = 1000
+    eviction_ratio = 0.9
 
     def __init__(self, *, num_res_return: int = 10, root: TrieNode = None, connect_to_db: bool = True,
-                 testing: bool = False, node_count: int = 1):
+                 testing: bool = False, node_count: int = 1, beam_width: int = 4,
+                 decay_half_life: float = None, token_phrases: bool = False, max_nodes: int = None,
+                 hot_prefix_length: int = 2, concurrent_init: bool = False):
         """
         :param num_res_return: maximum number of results to return to user
+        :param beam_width: maximum number of corrected phrases recorded for a multi-word search
+        :param decay_half_life: seconds after which a search counts half, None disables time decay
+        :param token_phrases: True if multi-word searches are kept in a token-level phrase index
+            instead of the character trie
+        :param max_nodes: node budget of the trie, least frequently used words are evicted beyond it,
+            None for no budget
+        :param hot_prefix_length: results of prefixes up to this length are precomputed on each refresh,
+            0 disables the table
+        :param concurrent_init: True if data files and the spelling corpus are loaded concurrently,
+            time taken by each step is recorded in load_timings. The corpus is parsed in a separate process,
+            so with the spawn or forkserver start methods the server must not be built at module import
         :param root: Trie node
         :param connect_to_db: True if server is connected to a database
         :param testing: True if server constructed in test scripts
@@ -58,31 +86,62 @@ class Server:
 
         self.vocab = set()
         self.node_count = node_count
+        if hot_prefix_length < 0:
+            raise ValueError('Hot prefix length cannot be negative')
+        self.hot_prefix_length = hot_prefix_length
+        self._hot_prefixes = {}     # prefix to tuple of top results
+        self._trie_version = 0      # incremented whenever nodes are removed, cursors then walk again
+        if max_nodes is not None and max_nodes < 1:
+            raise ValueError('Node budget should be at least 1')
+        self.max_nodes = max_nodes
         self.search_count = 0  # tracking number of search before performing trie update
 
+        # terms deleted in bulk but not yet purged from the trie, blocked terms are never purged from it
+        self.tombstones = set()
+        self.blocklist = set()
+        self._tombstone_lengths = set()
+        self.pending_deletes = 0
+
+        # Time decay: a search at time t adds exp(decay_rate * (t - decay_reference)) to the counts,
+        # so counts stay comparable without rescanning the trie. Nodes catch up with a new reference lazily.
+        if decay_half_life is not None and decay_half_life <= 0:
+            raise ValueError('Decay half life should be positive')
+        self.decay_rate = math.log(2) / decay_half_life if decay_half_life else 0.0
+        self.clock = time.time
+        self.decay_reference = self.clock()
+
         self.testing = testing
         # displays at most 10 terms in history
         self.search_history = deque(maxlen=10)
 
+        # independent data sources are loaded by the pipeline, the trie is built once the word list is read
+        pipeline = loader.LoadPipeline(concurrent=concurrent_init)
+        self.load_timings = pipeline.timings
+        spell_checker = pipeline.submit_cpu('spell_corpus', Spell)
+
         # Logging facilities
         if not testing:
-            with open('logging.config', 'r') as f:
-                config = yaml.safe_load(f)
-            logging.config.dictConfig(config)
+            config = pipeline.submit_io('logging_config', loader.load_yaml, 'logging.config')
+            word_frequencies = pipeline.submit_io('word_list', loader.read_word_frequencies,
+                                                  'data/5000_most_freq_words.csv')
+            logging.config.dictConfig(config.result())
             self.logger = logging.getLogger('Trie_db')
             self.insertLogger = logging.getLogger('Trie_db.insert')
 
-            with open('data/5000_most_freq_words.csv') as csv_file:
-                words_reader = csv.reader(csv_file)
-                for row in words_reader:
-                    _, _, word, freq, _ = row
-                    freq = int(freq)
+            with pipeline.timed('trie_build'):
+                for word, freq in word_frequencies.result():
                     self.__insert(word, isword=True, count=freq, from_db=True)
         else:
             self.word_dictionary = set()
 
         self._num_res_return = num_res_return
-        self.spell_checker = Spell()
+        self.beam_width = beam_width
+        self.phrase_index = PhraseIndex() if token_phrases else None
+        self.spell_checker = spell_checker.result()
+        pipeline.shutdown()
+        # read-only lookups rank loaded words before the first search refreshes top results
+        with pipeline.timed('top_results'):
+            self.update_top_results()
 
     def __str__(self):
         return self.__repr__()
@@ -120,6 +179,21 @@ class Server:
         if val < 1:
             raise ReturnResultValueLessThanOne('should return at least 1 result.')
         self._num_res_return = val
+        self._build_hot_prefixes()
+
+    # accessor for beam_width
+    @property
+    def beam_width(self):
+        return self._beam_width
+
+    @beam_width.setter
+    def beam_width(self, val):
+        self.__set_beam_width(val)
+
+    def __set_beam_width(self, val):
+        if val < 1:
+            raise BeamWidthLessThanOne('beam width should be at least 1.')
+        self._beam_width = val
 
     def app_reset(self):
         self.__init__()
@@ -128,10 +202,36 @@ class Server:
     def _get_num_server_instances(cls):
         return cls.server_index
 
+    def _trie_root(self) -> TrieNode:
+        return self.__root
+
+    def cursor(self):
+        """
+        Create a cursor for keystroke-by-keystroke lookup, see cursor.PrefixCursor.
+        :return: PrefixCursor
+        """
+        return PrefixCursor(self)
+
     def top_results(self, num_results=10):
-        res = self.__root.top_results.most_common(num_results)
+        self.__rebase(self.__root)
+        res = self.__top_terms(self.__root, num_results)
         return [word for word, count in res]
 
+    def __top_terms(self, node: TrieNode, num_results: int):
+        """
+        Most common terms of a node which are not deleted.
+        :param node: TrieNode
+        :param num_results: int
+        :return: List[Tuple[str, int]]
+        """
+        size = num_results
+        while True:
+            top = node.top_results.most_common(size)
+            res = [word_freq for word_freq in top if not self._is_deleted(word_freq[0])]
+            if len(res) >= num_results or len(top) < size:
+                return res[:num_results]
+            size *= 2
+
     # def build_db(self):
     #     """
     #     This method removes data from database and build new graph with in-memory data in application server.
@@ -244,55 +344,239 @@ class Server:
 
         cur.isWord = isword
 
+        weight = 1 if from_db else self._decay_weight()
+        self.__rebase(cur)
         if from_db:
             cur.count = 0
             cur.set_total_counts(count)
         else:
-            cur.count += 1
+            cur.count += weight
 
         if not self.testing:
             self.insertLogger.debug(f'Insert used for {word}')
 
         return cur
 
-    def delete(self, term):
+    def __find_prefix(self, term: str):
         """
-        Search the specified term and delete the node if found.
-        Also delete nodes in the subtree.
+        Find the node of a prefix in the trie, whether it is a word or not.
         :param term: str
-        :return: None
+        :return: TrieNode or None if the prefix is not in the trie
         """
         target_node = self.__root
         for letter in term:
             if letter not in target_node.children:
-                return
+                return None
             target_node = target_node.children[letter]
+        return target_node
+
+    def __find_word(self, term: str):
+        """
+        Find the node of a word in the trie.
+        :param term: str
+        :return: TrieNode or None if the term is not a word in the trie
+        """
+        target_node = self.__find_prefix(term)
 
         # if target node is not a word, meaning that the term does not exist
-        if not target_node.isWord:
-            return
+        if target_node is None or not target_node.isWord:
+            return None
+        return target_node
 
+    def __detach(self, target_node: TrieNode):
+        """
+        Remove the subtree rooted at target node and ancestors left without words or children.
+        Top results of the remaining ancestors are not changed.
+        :param target_node: TrieNode
+        :return: set(str), TrieNode
+            terms deleted and the lowest remaining ancestor
+        """
         words_to_del, total_deleted = Server.__delete_helper(target_node)
 
         self.node_count -= total_deleted
+        self._trie_version += 1
 
         # delete subtree rooted at the node contains the term
-        last_letter = term[-1]
-        target_node.parent.children.pop(last_letter)
+        target_node.parent.children.pop(target_node.prefix[-1])
 
         # delete parent nodes that do not contain whole term
         start_node = target_node.parent
-        while start_node and start_node.parent and not start_node.isWord:
+        while start_node and start_node.parent and not start_node.isWord and not start_node.children:
             last_letter = start_node.prefix[-1]
             start_node.parent.children.pop(last_letter)
             self.node_count -= 1
             start_node = start_node.parent
+        return words_to_del, start_node
+
+    def delete(self, term):
+        """
+        Search the specified term and delete the node if found.
+        Also delete nodes in the subtree.
+        :param term: str
+        :return: None
+        """
+        target_node = self.__find_word(term)
+        if target_node is None:
+            return
+
+        words_to_del, start_node = self.__detach(target_node)
 
         # remove all deleted terms from the top results of parent nodes of the target node
         while start_node:
             for word in words_to_del:
                 start_node.top_results.pop(word, None)
             start_node = start_node.parent
+        self._build_hot_prefixes()
+
+    def delete_many(self, terms):
+        """
+        Delete terms and the terms in their subtrees in bulk.
+        Deleted terms are filtered from results immediately and purged from the trie by compact(),
+        which runs on a top results refresh once compaction_threshold terms are pending.
+        Terms which are not words in the trie are ignored.
+        :param terms: Iterable[str]
+        :return: None
+        """
+        terms = [term for term in terms if term not in self.tombstones and self.__find_word(term)]
+        self.__add_tombstones(terms)
+
+    def block(self, terms):
+        """
+        Permanently hide terms and every term starting with them, whether searched already or not.
+        Blocked terms are purged by each compaction.
+        :param terms: Iterable[str]
+        :return: None
+        """
+        terms = [term for term in terms if term]
+        self.blocklist.update(terms)
+        self.__add_tombstones([term for term in terms if term not in self.tombstones])
+
+    def __add_tombstones(self, terms):
+        self.tombstones.update(terms)
+        self._tombstone_lengths.update(len(term) for term in terms)
+        self.pending_deletes += len(terms)
+        if terms:
+            self._build_hot_prefixes()
+
+    def _is_deleted(self, term: str) -> bool:
+        """
+        Check if a term or one of its prefixes is tombstoned.
+        :param term: str
+        :return: bool
+        """
+        if not self.tombstones:
+            return False
+        return any(term[:length] in self.tombstones for length in self._tombstone_lengths)
+
+    def compact(self):
+        """
+        Purge tombstoned terms and their subtrees from the trie.
+        Each affected ancestor filters its top results once, however many terms were deleted under it.
+        :return: None
+        """
+        if not self.tombstones:
+            return
+        affected = {}
+        for term in self.tombstones:
+            # a blocked prefix need not be a word, every term under it is purged
+            target_node = self.__find_prefix(term)
+            if target_node is None:
+                continue
+            _, start_node = self.__detach(target_node)
+            while start_node and id(start_node) not in affected:
+                affected[id(start_node)] = start_node
+                start_node = start_node.parent
+
+        Server.__purge_top_results(affected.values(), self._is_deleted)
+        self._build_hot_prefixes()
+
+        self.tombstones = set(self.blocklist)
+        self._tombstone_lengths = {len(term) for term in self.tombstones}
+        self.pending_deletes = 0
+
+    @staticmethod
+    def __purge_top_results(nodes, is_removed):
+        """
+        Remove terms from the top results of nodes.
+        :param nodes: Iterable[TrieNode]
+        :param is_removed: function returning True for terms to remove
+        :return: None
+        """
+        for node in nodes:
+            for word in [word for word in node.top_results if is_removed(word)]:
+                node.top_results.pop(word)
+
+    def _evict(self, protected: List[TrieNode] = ()):
+        """
+        Evict least frequently used word leaves and the branches left without words
+        until the trie is back to eviction_ratio of its node budget.
+        :param protected: nodes which are not evicted, the trie may then stay over budget
+        :return: None
+        """
+        protected = {id(node) for node in protected}
+        if self.max_nodes is None or self.node_count <= self.max_nodes:
+            return
+        target = int(self.max_nodes * self.eviction_ratio)
+
+        heap = []
+        stack = [self.__root]
+        while stack:
+            node = stack.pop()
+            if not node.children and node.parent is not None and id(node) not in protected:
+                heap.append((node.total_counts() + node.count, node.prefix, node))
+            stack.extend(node.children.values())
+        heapq.heapify(heap)
+
+        evicted = set()
+        affected = {}
+        while heap and self.node_count > target:
+            _, _, leaf = heapq.heappop(heap)
+            words, start_node = self.__detach(leaf)
+            evicted |= words
+            if start_node.parent is not None and not start_node.children and id(start_node) not in protected:
+                # a word whose only branch was evicted becomes a leaf
+                heapq.heappush(heap, (start_node.total_counts() + start_node.count, start_node.prefix, start_node))
+            while start_node and id(start_node) not in affected:
+                affected[id(start_node)] = start_node
+                start_node = start_node.parent
+
+        Server.__purge_top_results(affected.values(), evicted.__contains__)
+        self._build_hot_prefixes()
+
+    def freeze(self, file, num_results_to_store=None):
+        """
+        Write a read-only snapshot of the trie which worker processes can memory-map and share,
+        see snapshot.TrieSnapshot. Deleted terms are left out.
+        :param file: path of the snapshot file
+        :param num_results_to_store: number of top results stored per node, defaults to num_res_return
+        :return: None
+        """
+        num_results_to_store = num_results_to_store or self.num_res_return
+
+        def top_terms(node):
+            self.__rebase(node)
+            return self.__top_terms(node, num_results_to_store)
+
+        snapshot.write_snapshot(self.__root, file, top_terms)
+
+    def memory_stats(self):
+        """
+        Report the size of the trie.
+        :return: dict with number of nodes, number of stored top results entries
+            and estimated bytes of nodes, their containers and prefixes
+        """
+        nodes = 0
+        entries = 0
+        num_bytes = 0
+        stack = [self.__root]
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            entries += len(node.top_results)
+            num_bytes += (sys.getsizeof(node) + sys.getsizeof(node.__dict__) + sys.getsizeof(node.children)
+                          + sys.getsizeof(node.top_results) + sys.getsizeof(node.prefix))
+            stack.extend(node.children.values())
+        return {'nodes': nodes, 'top_results_entries': entries, 'estimated_bytes': num_bytes}
 
     @staticmethod
     def __delete_helper(node):
@@ -339,35 +623,156 @@ class Server:
             replacements = self.spell_checker.most_likely_replacements(word, num_res=2)
             _word_lists.append(replacements)
 
-        replacement_list = []
-        Server.__search_helper(_word_lists, 0, [], replacement_list)
+        phrases = self._replacement_phrases(_word_lists)
+        if self.phrase_index is not None and len(_words) > 1:
+            return self._complete_phrases(phrases)
+
+        candidates = self._record_phrases(phrases)
+        self._refresh_top_results(candidates)
+        return self._rank_candidates(candidates)
+
+    def _complete_phrases(self, phrases: Word_list) -> Word_list:
+        """
+        Record multi-word phrases in the phrase index and complete their last words.
+        :param phrases: List[str], most likely first
+        :return: List[str]
+        """
+        for phrase in phrases:
+            self.phrase_index.record(phrase)
+        res = []
+        for phrase in phrases:
+            for completion in self.phrase_index.complete(phrase, num_results=self.num_res_return):
+                if completion not in res and not self._is_deleted(completion):
+                    res.append(completion)
+        return res[:self.num_res_return]
+
+    def fuzzy_search(self, search_term: str, max_distance: int = 1) -> Word_list:
+        """
+        Read-only search for partially typed input that tolerates typos.
+        Walks the trie computing one row of the Levenshtein table per node and prunes branches
+        whose row minimum exceeds max_distance. Each completion is ranked under the closest of its
+        prefixes within max_distance, completions of prefixes closer to the input come first.
+        The search is not recorded.
+        :param search_term: str
+        :param max_distance: maximum number of edits between the input and a trie prefix
+        :return: List[str]
+        """
+        if not isinstance(search_term, str):
+            raise TypeError("{} is not a string".format(search_term))
+        if max_distance < 0:
+            raise ValueError('Edit distance cannot be negative')
+        query = ' '.join(search_term.lower().split())
+        if not query:
+            return []
+
+        matches = [[] for _ in range(max_distance + 1)]
+        # each entry carries the smallest distance of a matching ancestor, whose top results cover the node
+        stack = [(child, list(range(len(query) + 1)), max_distance + 1) for child in self.__root.children.values()]
+        while stack:
+            node, previous_row, covered = stack.pop()
+            char = node.prefix[-1]
+            row = [previous_row[0] + 1]
+            for i in range(1, len(query) + 1):
+                row.append(min(row[i - 1] + 1, previous_row[i] + 1,
+                               previous_row[i - 1] + (query[i - 1] != char)))
+            if row[-1] < covered:
+                # a longer prefix closer to the input ranks its completions ahead of the ancestor's
+                matches[row[-1]].append(node)
+                covered = row[-1]
+            if min(row) <= max_distance:
+                stack.extend((child, row, covered) for child in node.children.values())
+
+        res = []
+        for nodes in matches:
+            for word in self._rank_candidates(sorted(nodes, key=lambda x: x.prefix)):
+                if word not in res:
+                    res.append(word)
+        return res[:self.num_res_return]
 
-        result = []
-        candidates = []
-        for words in replacement_list:
-            last_node = self.__insert(' '.join(words), from_db=False)
-            candidates.append(last_node)
+    def _replacement_phrases(self, word_lists: Word_lists) -> Word_list:
+        """
+        Choose the most likely phrases from the replacements of each word.
+        Beam search keeps at most beam_width partial phrases scored by the sum of
+        word log probabilities, so the cost is linear in the number of words.
+        :param word_lists: replacements for each word in the search term
+        :return: List[str], at most beam_width phrases, most likely first
+        """
+        beam = [(0.0, [])]
+        for replacements in word_lists:
+            expanded = [(score + self.spell_checker.log_probability(word), words + [word])
+                        for score, words in beam for word in replacements]
+            beam = heapq.nlargest(self.beam_width, expanded, key=lambda x: x[0])
+        return [' '.join(words) for _, words in beam]
+
+    def _record_phrases(self, phrases: Word_list) -> List[TrieNode]:
+        """
+        Record searches of phrases in the trie. Top results are not refreshed.
+        :param phrases: List[str]
+        :return: List[TrieNode], node of each phrase
+        """
+        nodes = []
+        for phrase in phrases:
+            nodes.append(self.__insert(phrase, from_db=False))
             self.search_count += 1
+        return nodes
 
-        if self.search_count >= Server.server_update_frequency:
+    def _refresh_top_results(self, candidates: List[TrieNode] = ()):
+        """
+        Refresh top results if enough searches were recorded since the last refresh.
+        :param candidates: nodes of the search being answered, kept by eviction so they can be ranked
+        :return: None
+        """
+        if self.search_count >= self.server_update_frequency:
             self.search_count = 0
+            if self.pending_deletes >= self.compaction_threshold:
+                self.compact()
             self.update_top_results()
+            self._evict(candidates)
 
+    def _rank_candidates(self, candidates: List[TrieNode]) -> Word_list:
+        """
+        Merge top results of candidate nodes, highest count first.
+        Each node contributes a stream of at most num_res_return terms already sorted by count,
+        the streams are merged lazily with a heap and terms found under several nodes are kept once.
+        :param candidates: List[TrieNode]
+        :return: List[str]
+        """
+        if len(candidates) == 1:
+            hot = self._hot_prefixes.get(candidates[0].prefix)
+            if hot is not None:
+                return list(hot)
         for node in candidates:
-            result.extend(node.top_results.most_common(self.num_res_return))
-
-        res = [word_freq[0] for word_freq in sorted(result, key=lambda x: x[1])]
-        return res[:self.num_res_return]
-
-    @staticmethod
-    def __search_helper(words: Word_list, idx: int, path: Word_list, res: Word_lists):
-        if idx == len(words):
-            res.append(list(path))
-            return
-        for word in words[idx]:
-            path.append(word)
-            Server.__search_helper(words, idx + 1, path, res)
-            path.pop()
+            self.__rebase(node)
+        streams = [self.__top_terms(node, self.num_res_return) for node in candidates]
+        res = []
+        seen = set()
+        for word, _ in heapq.merge(*streams, key=lambda x: -x[1]):
+            if word in seen:
+                continue
+            seen.add(word)
+            res.append(word)
+            if len(res) == self.num_res_return:
+                break
+        return res
+
+    def _decay_weight(self) -> float:
+        """
+        Weight of a search made now relative to the decay reference time.
+        Moves the reference time forward when the weight grows too large, nodes are rescaled lazily.
+        :return: float, 1 if time decay is disabled
+        """
+        if not self.decay_rate:
+            return 1
+        now = self.clock()
+        exponent = self.decay_rate * (now - self.decay_reference)
+        if exponent > self.max_decay_exponent:
+            self.decay_reference = now
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def __rebase(self, node: TrieNode):
+        if self.decay_rate:
+            node.rebase(self.decay_reference, self.decay_rate)
 
     def update_top_results(self):
         """
@@ -377,15 +782,35 @@ class Server:
 
         def dfs(node):
             if len(node.children) == 0:
-                Server.update_parent_new(node, Counter())
+                Server.update_parent_new(node, Counter(), self.decay_reference, self.decay_rate)
                 return
             for child in node.children:
                 dfs(node.children[child])
 
         dfs(self.__root)
+        self._build_hot_prefixes()
+
+    def _build_hot_prefixes(self):
+        """
+        Precompute results of all prefixes up to hot_prefix_length characters.
+        Short prefixes have the largest top results, a lookup in the table avoids ranking them on every search.
+        :return: None
+        """
+        table = {}
+        level = list(self.__root.children.values()) if self.hot_prefix_length else []
+        for _ in range(self.hot_prefix_length):
+            next_level = []
+            for node in level:
+                self.__rebase(node)
+                table[node.prefix] = tuple(word for word, _ in self.__top_terms(node, self.num_res_return))
+                next_level.extend(node.children.values())
+            level = next_level
+        self._hot_prefixes = table
 
     @staticmethod
-    def update_parent_new(node, d):
+    def update_parent_new(node, d, reference=None, decay_rate=0.0):
+        if decay_rate:
+            node.rebase(reference, decay_rate)
         if node.isWord:
             d[node.prefix] = node.count
             node.count = 0
@@ -393,7 +818,7 @@ class Server:
         node.top_results.update(d)
         # node.set_total_counts(temp)
         if node.parent:
-            Server.update_parent_new(node.parent, d)
+            Server.update_parent_new(node.parent, d, reference, decay_rate)
 
     @classmethod
     def path_compression(cls, server):
@@ -450,7 +875,11 @@ class Server:
         counter = Counter()
         while idx < len(counts):
             term = ' '.join(counts[idx].split('_'))
-            counter[term] = int(counts[idx + 1])
+            try:
+                counter[term] = int(counts[idx + 1])
+            except ValueError:
+                # decayed counts are floats
+                counter[term] = float(counts[idx + 1])
             idx += 2
         return counter
 
@@ -467,14 +896,17 @@ class Server:
             if node is None:
                 return
             top_results = Server.__counter_serialization(
-                node.top_results,
+                Counter({word: count for word, count in node.top_results.items() if not self._is_deleted(word)}),
                 num_results_to_serialize=num_results_to_serialize,
             )
             isword = '1' if node.isWord else '0'
-            data.append([node.prefix, isword, top_results, str(len(node.children))])
-            for child in node.children:
-                dfs(node.children[child])
+            children = [child for child in node.children.values() if not self._is_deleted(child.prefix)]
+            data.append([node.prefix, isword, top_results, str(len(children))])
+            for child in children:
+                dfs(child)
 
+        # deleted terms must not come back with a rebuilt server
+        self.compact()
         data = []
         dfs(self.__root)
         return data
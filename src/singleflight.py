@@ -0,0 +1,99 @@
+"""
+    Request coalescing.
+
+    When several callers ask for the same key at once, only the first one runs the computation
+    and the others wait for its result, so a burst of cache misses on a new term costs one search.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key across threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __len__(self):
+        """
+        Return number of keys being computed
+        :return: int
+        """
+        return len(self._calls)
+
+    def do(self, key, fn, *args):
+        """
+        Run fn(*args) unless a call for key is already in flight, in which case wait for its result.
+        An exception raised by the running call is raised in every waiting caller.
+        :param key: hashable key of the computation
+        :param fn: function to run
+        :return: result of fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent calls per key on one event loop"""
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, fn, *args):
+        """
+        Await fn(*args) unless a call for key is already in flight, in which case wait for its result.
+        :param key: hashable key of the computation
+        :param fn: coroutine function to run
+        :return: result of fn
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn(*args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # waiters receive the exception, do not report it as never retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -0,0 +1,193 @@
+"""
+    Read-only trie snapshot shared between worker processes.
+
+    The trie is frozen into flat arrays, edges in CSR layout, per-node top results as IDs into
+    a string table, and written to one file. Workers memory-map the file, so the operating system
+    keeps a single copy in its page cache and no Python object per node is created, which would
+    dirty shared pages with reference count updates. A file under /dev/shm stays in shared memory.
+
+    File layout: magic, header length, JSON header describing each array, arrays aligned to 8 bytes.
+"""
+from collections import deque
+import json
+import mmap
+import struct
+from typing import List
+
+import numpy as np
+
+from src.errors import ReturnResultValueLessThanOne
+
+MAGIC = b'TRIESNAP'
+_ALIGNMENT = 8
+
+
+def write_snapshot(root, file, top_terms):
+    """
+    Freeze a trie into a snapshot file. Nodes are numbered in breadth-first order, the root is node 0.
+    :param root: TrieNode, root of an uncompressed trie
+    :param file: path of the snapshot file
+    :param top_terms: function returning the (term, count) pairs stored for a node, highest count first
+    :return: None
+    """
+    strings = {}
+    is_word = []
+    first_edge = [0]
+    edge_chars = []
+    edge_child = []
+    top_offsets = [0]
+    top_ids = []
+    top_counts = []
+
+    queue = deque([root])
+    num_nodes = 1
+    while queue:
+        node = queue.popleft()
+        is_word.append(node.isWord)
+        for char, child in sorted(node.children.items()):
+            edge_chars.append(ord(char))
+            edge_child.append(num_nodes)
+            num_nodes += 1
+            queue.append(child)
+        first_edge.append(len(edge_chars))
+        for term, count in top_terms(node):
+            top_ids.append(strings.setdefault(term, len(strings)))
+            top_counts.append(count)
+        top_offsets.append(len(top_ids))
+
+    encoded = [term.encode('utf-8') for term in strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(term) for term in encoded], out=string_offsets[1:])
+
+    arrays = {
+        'is_word': np.array(is_word, dtype=np.uint8),
+        'first_edge': np.array(first_edge, dtype=np.int64),
+        'edge_chars': np.array(edge_chars, dtype=np.int32),
+        'edge_child': np.array(edge_child, dtype=np.int64),
+        'top_offsets': np.array(top_offsets, dtype=np.int64),
+        'top_ids': np.array(top_ids, dtype=np.int64),
+        'top_counts': np.array(top_counts, dtype=np.float64),
+        'string_offsets': string_offsets,
+        'string_data': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+    }
+
+    header = {}
+    offset = 0
+    for name, array in arrays.items():
+        header[name] = {'dtype': array.dtype.str, 'length': len(array), 'offset': offset}
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // _ALIGNMENT) * _ALIGNMENT
+
+    with open(file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header[name]['offset'])
+            f.write(array.tobytes())
+        # pad so the last array ends inside the file even when it is empty
+        f.truncate(data_start + offset)
+
+
+class TrieSnapshot:
+    """Read path over a memory-mapped trie snapshot
+
+    Offers the search(str) and top_results(int) API of Server without recording searches
+    or correcting spelling.
+    """
+
+    def __init__(self, file, *, num_res_return: int = 10):
+        """
+        :param file: snapshot file written by write_snapshot() or Server.freeze()
+        :param num_res_return: maximum number of results to return to user
+        """
+        self.num_res_return = num_res_return
+        with open(file, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f'{file} is not a trie snapshot')
+        header_length, = struct.unpack_from('<Q', self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+        data_start = -(-(header_start + header_length) // _ALIGNMENT) * _ALIGNMENT
+
+        for name, meta in header.items():
+            setattr(self, name, np.frombuffer(self._mmap, dtype=np.dtype(meta['dtype']), count=meta['length'],
+                                              offset=data_start + meta['offset']))
+
+    def __repr__(self):
+        return f"Trie snapshot with {len(self)} nodes"
+
+    def __len__(self):
+        return len(self.is_word)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Release the memory map. Arrays of the snapshot must not be used afterwards.
+        :return: None
+        """
+        for name in ('is_word', 'first_edge', 'edge_chars', 'edge_child', 'top_offsets', 'top_ids',
+                     'top_counts', 'string_offsets', 'string_data'):
+            self.__dict__.pop(name, None)
+        self._mmap.close()
+
+    # accessor for num_res_return
+    @property
+    def num_res_return(self):
+        return self._num_res_return
+
+    @num_res_return.setter
+    def num_res_return(self, val):
+        if val < 1:
+            raise ReturnResultValueLessThanOne('should return at least 1 result.')
+        self._num_res_return = val
+
+    def _string(self, string_id: int) -> str:
+        start, end = self.string_offsets[string_id], self.string_offsets[string_id + 1]
+        return self.string_data[start:end].tobytes().decode('utf-8')
+
+    def _find(self, prefix: str):
+        """
+        Walk edges from the root.
+        :param prefix: str
+        :return: int, node ID or None if the prefix is not in the trie
+        """
+        node = 0
+        for char in prefix:
+            start, end = self.first_edge[node], self.first_edge[node + 1]
+            code = ord(char)
+            idx = start + np.searchsorted(self.edge_chars[start:end], code)
+            if idx == end or self.edge_chars[idx] != code:
+                return None
+            node = self.edge_child[idx]
+        return node
+
+    def _top(self, node: int, num_results: int) -> List[str]:
+        start = self.top_offsets[node]
+        end = min(self.top_offsets[node + 1], start + num_results)
+        return [self._string(string_id) for string_id in self.top_ids[start:end]]
+
+    def search(self, search_term: str) -> List[str]:
+        """
+        Return the top results stored for the node of search_term.
+        :param search_term: str
+        :return: List[str]
+        """
+        if not isinstance(search_term, str):
+            raise TypeError("{} is not a string".format(search_term))
+        prefix = ' '.join(search_term.lower().split())
+        if not prefix:
+            return []
+        node = self._find(prefix)
+        return [] if node is None else self._top(node, self.num_res_return)
+
+    def top_results(self, num_results=10):
+        return self._top(0, num_results)
@@ -5,6 +5,7 @@ Ref: http://norvig.com/spell-correct.html
 
 """
 from collections import Counter
+import math
 import re
 import string
 
@@ -19,6 +20,10 @@ class Spell:
     def probability(self, word):
         return self.words[word] / self.total_words
 
+    def log_probability(self, word):
+        """ Log probability of word, unseen words are counted as half an occurrence"""
+        return math.log((self.words[word] or 0.5) / self.total_words)
+
     @staticmethod
     def edit_one(word):
         """ Find all words that are One edit away from word"""
@@ -44,7 +49,7 @@ class Spell:
         return [word for word in words if word in self.words]
 
     def candidates(self, word):
-        return self.known([word]) or self.known(Spell.edit_one(word)) or self.known(Spell.edit_two(word)) or set(word)
+        return self.known([word]) or self.known(Spell.edit_one(word)) or self.known(Spell.edit_two(word)) or [word]
 
     def correction(self, word):
         return max(self.candidates(word), key=self.probability)
@@ -1,4 +1,5 @@
 from collections import Counter
+import math
 
 
 class TrieNode:
@@ -19,6 +20,7 @@ class TrieNode:
         self.parent = parent
         self.count = 0      # number of times the term is searched after last trie update
         self.top_results = Counter()
+        self.reference = None   # reference time of decayed counts, None until counts are decayed
         if is_word:
             self.top_results[self.prefix] = 1
         self.isWord = is_word
@@ -37,3 +39,21 @@ class TrieNode:
         :return: None
         """
         self.top_results[self.prefix] = val
+
+    def rebase(self, reference, decay_rate):
+        """
+        Express decayed counts of the node relative to a new reference time.
+        Counts are scaled lazily, only when the node is touched after the reference changed.
+        :param reference: reference time of the server
+        :param decay_rate: exponential decay rate per second
+        :return: None
+        """
+        if self.reference is None:
+            self.reference = reference
+        if self.reference == reference:
+            return
+        factor = math.exp(-decay_rate * (reference - self.reference))
+        self.count *= factor
+        for term in self.top_results:
+            self.top_results[term] *= factor
+        self.reference = reference
@@ -1,3 +1,16 @@
+const sessionId = Math.random().toString(36).slice(2);
+
+async function suggest_words() {
+    const searchTerm = document.getElementById("searchTerm").value;
+    const results = await (await fetch(`/cursor?session=${sessionId}&term=${encodeURIComponent(searchTerm)}`)).json();
+
+    let resultsList = $('#results')
+    resultsList.empty();
+    for (const r of results.results) {
+        resultsList.append($('<li>').addClass('list-group-item list-group-item-light').text(r));
+    }
+}
+
 async function search_words() {
     const searchTerm = document.getElementById("searchTerm").value;
     const results = await (await fetch(`/search?term=${searchTerm}`)).json();
@@ -21,6 +34,7 @@ async function loadSearchHistory() {
 }
 
 $('#searchBtn').click(search_words);
+$('#searchTerm').on('input', suggest_words);
 $('#searchTerm').on('keypress',
     async (e) => {
         if (e.key === 'Enter') {
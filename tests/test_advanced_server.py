@@ -0,0 +1,41 @@
+import pytest
+from src.advanced_server import AdvTrie
+
+
+@pytest.fixture(name='adv')
+def get_adv():
+    return AdvTrie(connect_to_db=False, testing=True)
+
+
+def test_search_refreshes_top_results_once(adv, monkeypatch):
+    # One query triggers exactly one top results refresh
+    calls = []
+    update = adv.update_top_results
+    monkeypatch.setattr(adv, 'update_top_results', lambda: calls.append(1) or update())
+    adv.search('helo world')
+    assert len(calls) == 1
+    assert list(adv.search_history) == ['helo world']
+
+
+def test_search_results_are_unique(adv):
+    # Basic results come first and corrections are not repeated
+    adv.search('machine')
+    res = adv.search('machine')
+    assert res[0] == 'machine'
+    assert len(res) == len(set(res))
+
+
+def test_search_blank_term(adv):
+    assert adv.search('') == []
+    assert adv.search('   ') == []
+
+
+def test_search_with_token_phrases_keeps_phrases_out_of_trie():
+    # Multi-word queries are completed from the phrase index as in the base class
+    adv = AdvTrie(connect_to_db=False, testing=True, token_phrases=True)
+    node_count = adv.node_count
+    res = adv.search('the quick brown fox jumps')
+    assert len(adv.phrase_index) > 0
+    assert all(' ' not in word for word in adv.top_results(100))
+    assert adv.node_count - node_count < 50
+    assert len(res) == len(set(res))
@@ -1,6 +1,10 @@
 import pytest
 import re
+from collections import deque
 from src.server import Server
+from src.spell import Spell
+from src.errors import BeamWidthLessThanOne
+from src.cursor import CursorSessions
 
 
 @pytest.fixture(name='app')
@@ -100,3 +104,222 @@ def test_server_reconstruction_similarity(app):
     s = app.server_serialization()
     new_app = Server.server_deserialization(s, testing=True)
     assert new_app.server_serialization() == s
+
+
+def test_beam_search_records_best_phrases(app, tmp_path):
+    # A long query with misspellings records at most beam_width phrases, most likely first
+    corpus = tmp_path / 'corpus.txt'
+    corpus.write_text('cat ' * 5 + 'car ' * 3 + 'bat ' * 2 + 'bar')
+    app.spell_checker = Spell(file=str(corpus))
+    app.beam_width = 3
+    phrases = app._replacement_phrases([['cat', 'car'], ['bat', 'bar']] * 5)
+    assert len(phrases) == 3
+    assert phrases[0] == ' '.join(['cat', 'bat'] * 5)
+    app.search(' '.join(['caz', 'baz'] * 5))
+    assert app.node_count <= 1 + 3 * len(phrases[0])
+
+
+def test_beam_width_less_than_one(app):
+    with pytest.raises(BeamWidthLessThanOne):
+        app.beam_width = 0
+
+
+def test_rank_candidates_merges_by_count(app):
+    # Results from several candidate nodes are deduplicated and sorted by count, highest first
+    app._record_phrases(['team'] * 7 + ['tea'] * 5 + ['ten'] * 3 + ['to'])
+    app.update_top_results()
+    te = app._Server__root.children['t'].children['e']
+    tea = te.children['a']
+    assert app._rank_candidates([tea, te]) == ['team', 'tea', 'ten']
+    app.num_res_return = 2
+    assert app._rank_candidates([te, tea]) == ['team', 'tea']
+
+
+def test_time_decay_ranks_recent_searches_first():
+    # With a one hour half life, three searches two hours ago weigh less than one search now
+    app = Server(connect_to_db=False, testing=True, decay_half_life=3600)
+    now = app.decay_reference
+    app.clock = lambda: now
+    app._record_phrases(['tea'] * 3)
+    app.clock = lambda: now + 7200
+    app._record_phrases(['ten'])
+    app.update_top_results()
+    assert app.top_results() == ['ten', 'tea']
+
+
+def test_time_decay_moves_reference_lazily():
+    # Moving the reference forward rescales nodes only when they are touched, ranking is unchanged
+    app = Server(connect_to_db=False, testing=True, decay_half_life=1)
+    now = app.decay_reference
+    app.clock = lambda: now
+    app._record_phrases(['tea'] * 4 + ['ten'])
+    app.update_top_results()
+    app.clock = lambda: now + 100
+    app._record_phrases(['to'])
+    app.update_top_results()
+    assert app.decay_reference == now + 100
+    assert app.top_results() == ['to', 'tea', 'ten']
+    te = app._Server__root.children['t'].children['e']
+    assert te.reference == now + 100
+    assert te.top_results['tea'] == pytest.approx(4 * 2 ** -100)
+
+
+def test_fuzzy_search_completes_typos(app):
+    # Partially typed input with one typo is completed instead of corrected to a whole word
+    app._record_phrases(['program'] * 3 + ['progress'] * 2 + ['project', 'pogo'])
+    app.update_top_results()
+    node_count = app.node_count
+    assert app.fuzzy_search('progr') == ['program', 'progress']
+    assert app.fuzzy_search('prigr') == ['program', 'progress']
+    assert app.fuzzy_search('progr', max_distance=2) == ['program', 'progress', 'pogo', 'project']
+    assert app.fuzzy_search('xyz') == []
+    assert app.node_count == node_count
+
+
+def test_fuzzy_search_before_any_search(app):
+    # Top results of a loaded trie are ready at construction, read-only lookups need no prior search
+    app._record_phrases(['program'] * 3 + ['progress'] * 2)
+    loaded = Server(root=app._Server__root, connect_to_db=False, testing=True)
+    assert loaded.fuzzy_search('progr') == ['program', 'progress']
+    assert loaded.fuzzy_search('prigr') == ['program', 'progress']
+
+
+def test_fuzzy_search_prefers_closer_longer_prefix(app):
+    # 'the' is within one edit of 'theo' but the exact prefix still ranks its completion first
+    app._record_phrases(['the'] * 10 + ['then'] * 9 + ['theory'])
+    app.update_top_results()
+    assert app.fuzzy_search('theo') == ['theory', 'the', 'then']
+
+
+def test_delete_many_filters_then_compacts(app):
+    # Deleted terms disappear from results at once and from the trie after compaction
+    app._record_phrases(['team'] * 3 + ['teams', 'tea', 'ten', 'tear'])
+    app.update_top_results()
+    node_count = app.node_count
+    app.delete_many(['team', 'tea', 'unknown'])
+    assert app.tombstones == {'team', 'tea'}
+    assert app.top_results() == ['ten']
+    assert app.node_count == node_count
+    app.compact()
+    assert app.tombstones == set()
+    assert app.node_count == 4
+    assert app._Server__root.top_results.keys() == {'ten'}
+
+
+def test_compaction_runs_on_refresh(app, monkeypatch):
+    monkeypatch.setattr(Server, 'compaction_threshold', 2)
+    app._record_phrases(['tea', 'ten', 'to'])
+    app.delete_many(['tea'])
+    app.search('to')
+    assert app.tombstones == {'tea'}
+    app.delete_many(['ten'])
+    app.search('to')
+    assert app.tombstones == set()
+    assert app.node_count == 3
+
+
+def test_block_hides_future_searches(app):
+    app.block(['badword'])
+    app.search('badwords')
+    assert app.search('badwords') == []
+    app.compact()
+    assert app.tombstones == {'badword'}
+    assert app.top_results() == []
+
+
+def test_blocked_prefix_is_purged_and_not_serialized(app):
+    # A blocked prefix which is not a word is purged, and a rebuilt server does not bring its terms back
+    app.block(['badword'])
+    app.search('badwords')
+    app.search('badwords')
+    assert app.node_count == 9
+    app.compact()
+    assert app.node_count == 1
+    app.search('badwords')
+    app.search('good')
+    rebuilt = Server.server_deserialization(app.server_serialization(), testing=True)
+    assert rebuilt.top_results() == ['good']
+    assert rebuilt.node_count == app.node_count == 5
+
+
+def test_node_budget_evicts_least_frequent_words():
+    # Cold words and their dead branches are evicted, ancestor top results stay consistent
+    app = Server(connect_to_db=False, testing=True, max_nodes=9)
+    app._record_phrases(['tea'] * 5 + ['team'] * 3 + ['toast', 'tin'])
+    app._refresh_top_results()
+    assert app.node_count == 5
+    assert app.top_results() == ['tea', 'team']
+    stats = app.memory_stats()
+    assert stats['nodes'] == app.node_count
+    assert stats['top_results_entries'] == 2 + 2 + 2 + 2 + 1
+    assert stats['estimated_bytes'] > 0
+
+
+def test_node_budget_keeps_term_being_searched():
+    # Eviction during a search never removes the node of the term it returns
+    app = Server(connect_to_db=False, testing=True, max_nodes=4)
+    assert app.search('tea') == ['tea']
+    assert app.search('xyzzy') == ['xyzzy']
+    assert app.top_results() == ['xyzzy']
+    assert app.node_count == 6
+
+
+def test_hot_prefix_table(app):
+    # Short prefixes are answered from the table built on refresh
+    app._record_phrases(['team'] * 3 + ['tea'] * 2 + ['ten'])
+    app.update_top_results()
+    assert app._hot_prefixes['t'] == ('team', 'tea', 'ten')
+    assert 'tea' not in app._hot_prefixes
+    te = app._Server__root.children['t'].children['e']
+    te.top_results['ten'] += 10
+    assert app._rank_candidates([te]) == ['team', 'tea', 'ten']
+    app.update_top_results()
+    assert app._rank_candidates([te]) == ['ten', 'team', 'tea']
+    app.delete_many(['team'])
+    assert app._rank_candidates([te]) == ['ten', 'tea']
+
+
+def test_prefix_cursor(app):
+    # A cursor follows keystrokes and backspaces without walking from the root or recording searches
+    app._record_phrases(['team'] * 3 + ['tea'] * 2 + ['ten', 'to'])
+    app.update_top_results()
+    cursor = app.cursor()
+    assert cursor.advance('t') == ['team', 'tea', 'ten', 'to']
+    assert cursor.advance('en') == ['ten']
+    assert cursor.advance('x') == []
+    assert cursor.backspace(2) == ['team', 'tea', 'ten']
+    assert cursor.update('TO') == ['to']
+    app.delete('to')
+    assert cursor.results() == []
+    assert cursor.update('tea') == ['team', 'tea']
+    assert app.search_history == deque()
+
+
+def test_cursor_sessions_are_lru_bounded(app):
+    app._record_phrases(['tea', 'to'])
+    app.update_top_results()
+    sessions = CursorSessions(app, max_sessions=2)
+    assert sessions.update('a', 'te') == ['tea']
+    sessions.update('b', 't')
+    sessions.update('a', 'tea')
+    sessions.update('c', 'to')
+    assert len(sessions) == 2
+    assert list(sessions._cursors) == ['a', 'c']
+
+
+def test_cursor_before_any_search(app):
+    # A cursor on a loaded trie has results before the first search, spaces are normalized as in search
+    app._record_phrases(['program'] * 3 + ['progress'] * 2)
+    loaded = Server(root=app._Server__root, connect_to_db=False, testing=True)
+    sessions = CursorSessions(loaded)
+    assert sessions.update('a', 'prog') == ['program', 'progress']
+    assert sessions.update('b', '  Progr ') == ['program', 'progress']
+    assert sessions.update('a', 'progra') == ['program']
+
+
+def test_cursor_finds_terms_inserted_after_typing(app):
+    # A session that typed past the end of the trie picks up nodes inserted later
+    sessions = CursorSessions(app)
+    assert sessions.update('a', 'tex') == []
+    app.search('text')
+    assert sessions.update('a', 'text') == ['text']
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import threading
+
+from async_service import AsyncAutocompleteService
+from iomanagers.async_redis_manager import AsyncRedisManager
+from iomanagers.memory_redis import AsyncInMemoryRedis
+from src.server import Server
+
+
+async def _get(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def _service(**kwargs):
+    app = Server(connect_to_db=False, testing=True)
+    return AsyncAutocompleteService(app, AsyncRedisManager(client=AsyncInMemoryRedis()), **kwargs)
+
+
+def test_search_is_cached_in_async_redis():
+    async def run():
+        service = _service()
+        listener = await service.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        assert await _get(port, '/search?term=machine') == (200, {"results": ['machine']})
+        assert await _get(port, '/search?term=machine') == (200, {"results": ['machine']})
+        assert await _get(port, '/history') == (200, {"result": ['machine', 'machine']})
+        assert await _get(port, '/missing') == (404, {"error": "not found"})
+        listener.close()
+        await service.close()
+        return service.redis_mgr.client.client.info()
+
+    assert asyncio.run(run()) == {'keyspace_hits': 2, 'keyspace_misses': 1}
+
+
+def test_requests_beyond_pending_limit_are_rejected():
+    # With one call already queued the next search gets 503 instead of waiting
+    async def run():
+        service = _service(max_pending=1)
+        release = threading.Event()
+        search = service.server.search
+        service.server.search = lambda term: release.wait() and search(term)
+        listener = await service.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        first = asyncio.ensure_future(_get(port, '/search?term=tea'))
+        while service.pending == 0:
+            await asyncio.sleep(0.01)
+        second = await _get(port, '/search?term=ten')
+        release.set()
+        listener.close()
+        await service.close()
+        return await first, second
+
+    first, second = asyncio.run(run())
+    assert first == (200, {"results": ['tea']})
+    assert second == (503, {"error": "too many pending requests"})
+
+
+def test_failed_search_returns_500():
+    # An error in the search is answered with 500 and the service keeps serving
+    async def run():
+        service = _service()
+        search = service.server.search
+
+        def failing_search(term):
+            if term == 'boom':
+                raise RuntimeError('search failed')
+            return search(term)
+        service.server.search = failing_search
+        listener = await service.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        failed = await _get(port, '/search?term=boom')
+        served = await _get(port, '/search?term=tea')
+        listener.close()
+        await service.close()
+        return failed, served
+
+    failed, served = asyncio.run(run())
+    assert failed == (500, {"error": "internal server error"})
+    assert served == (200, {"results": ['tea']})
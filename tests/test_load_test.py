@@ -0,0 +1,61 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import math
+import threading
+import time
+
+from load_test import expand_keystrokes, percentile, report, run_load
+
+
+def test_percentile_is_nearest_rank():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+    assert percentile(values, 50) == 5.0
+    assert percentile(values, 95) == 10.0
+    assert percentile(values, 10) == 1.0
+    assert percentile(values, 100) == 10.0
+    assert percentile([3.0], 99) == 3.0
+    assert math.isnan(percentile([], 50))
+
+
+def test_expand_keystrokes():
+    assert expand_keystrokes(['tea', 'go']) == ['t', 'te', 'tea', 'g', 'go']
+    assert expand_keystrokes([]) == []
+
+
+def test_report_summarizes_latencies_and_cache():
+    class Client:
+        def info(self, section=None):
+            return {'keyspace_hits': 3, 'keyspace_misses': 1}
+
+    stats = {'requests': 5, 'errors': 1, 'elapsed': 2.0, 'latencies': [0.001, 0.002, 0.003, 0.004]}
+    res = report(stats, Client())
+    assert res['requests'] == 5
+    assert res['errors'] == 1
+    assert res['throughput'] == 2.0
+    assert res['p50_ms'] == 2.0
+    assert res['p99_ms'] == 4.0
+    assert res['cache_hit_ratio'] == 0.75
+    assert report(stats)['cache_hit_ratio'] is None
+
+
+def test_latency_includes_time_queued_behind_slow_requests():
+    # With one client and requests scheduled faster than served, later requests wait in the queue
+    class SlowHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(0.05)
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'[]')
+
+        def log_message(self, *args):
+            pass
+
+    http_server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    try:
+        stats = run_load(f"http://127.0.0.1:{http_server.server_port}", ['t'] * 5, rate=1000, concurrency=1)
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
+    assert stats['errors'] == 0
+    assert stats['latencies'][-1] >= 0.2
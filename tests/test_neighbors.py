@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from src.advanced_server import AdvTrie
+from src.neighbors import build_neighbor_table
+
+
+def test_neighbor_table_matches_ball_tree():
+    # Chunked table should give the same neighbors as the BallTree it replaces
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(50, 8))
+    table = build_neighbor_table(embeddings, k=5, chunk_size=7)
+    expected = BallTree(embeddings).query(embeddings, k=6, return_distance=False)[:, 1:]
+    assert table.dtype == np.int32
+    assert (table == expected).all()
+
+
+def test_next_words_from_neighbor_table(tmp_path):
+    # AdvTrie looks up next words from a prebuilt table without training a BallTree
+    vocab_int = {'king': 0, 'queen': 1, 'apple': 2, 'pear': 3}
+    embeddings = [[0.0, 0.0], [0.0, 1.0], [10.0, 10.0], [10.0, 11.5]]
+    (tmp_path / 'vocab.json').write_text(json.dumps(vocab_int))
+    np.save(tmp_path / 'neighbors.npy', build_neighbor_table(embeddings, k=2))
+
+    adv = AdvTrie(home_dir=str(tmp_path), vocab_int_json='vocab.json', neighbor_table='neighbors.npy',
+                  connect_to_db=False, testing=True)
+    assert not hasattr(adv, 'searcher')
+    assert adv._next_words('king') == ['queen', 'apple']
+    assert adv._next_words('pear') == ['apple', 'queen']
+    assert adv._next_words('unknown') == []
+
+
+def test_concurrent_init_loads_ball_tree_in_background(tmp_path):
+    # The embedding model is trained in a worker process and step timings are reported
+    vocab_int = {'king': 0, 'queen': 1, 'apple': 2}
+    (tmp_path / 'vocab.json').write_text(json.dumps(vocab_int))
+    (tmp_path / 'embeddings.json').write_text(json.dumps([[0.0, 0.0], [0.0, 1.0], [10.0, 10.0]]))
+
+    adv = AdvTrie(home_dir=str(tmp_path), vocab_int_json='vocab.json', embedding_json='embeddings.json',
+                  connect_to_db=False, testing=True, concurrent_init=True)
+    assert adv.wait_until_ready(timeout=60)
+    assert adv.embedding_error is None
+    assert adv._next_words('king') == ['queen', 'apple']
+    assert {'spell_corpus', 'vocab_int', 'ball_tree'} <= adv.load_timings.keys()
@@ -0,0 +1,40 @@
+from src.personalization import UserOverlays
+from src.server import Server
+
+
+def test_personal_terms_come_first():
+    overlays = UserOverlays(max_personal_results=2)
+    for term in ['tensor', 'tensor', 'Teapot', 'cat']:
+        overlays.record('alice', term)
+    global_results = ['team', 'tea', 'teapot', 'ten']
+    assert overlays.merge('alice', 'te', global_results, num_results=4) == ['tensor', 'teapot', 'team', 'tea']
+    assert overlays.merge('bob', 'te', global_results, num_results=3) == ['team', 'tea', 'teapot']
+
+
+def test_overlays_are_memory_bounded():
+    # Each user keeps its most searched terms, inactive users are evicted first
+    overlays = UserOverlays(max_terms_per_user=2, max_total_terms=4)
+    for term in ['tea', 'tea', 'ten', 'to']:
+        overlays.record('alice', term)
+    assert overlays.personal_results('alice', 't') == ['tea', 'to']
+    overlays.record('bob', 'cat')
+    overlays.record('alice', 'tea')
+    overlays.record('carol', 'cow')
+    overlays.record('carol', 'cup')
+    assert overlays.total_terms == 4
+    assert len(overlays) == 2
+    assert overlays.personal_results('bob', 'c') == []
+    assert overlays.personal_results('alice', 'te') == ['tea']
+
+
+def test_deleted_and_blocked_terms_are_not_personalized():
+    # Terms removed from the server are hidden from overlays as well as from global results
+    app = Server(connect_to_db=False, testing=True)
+    overlays = UserOverlays()
+    for term in ['damn', 'dame', 'dog']:
+        overlays.record('alice', term)
+    app._record_phrases(['dog'])
+    app.block(['damn'])
+    app.delete_many(['dog'])
+    assert overlays.merge('alice', 'd', ['day'], is_deleted=app._is_deleted) == ['dame', 'day']
+    assert overlays.personal_results('alice', 'da') == ['dame', 'damn']
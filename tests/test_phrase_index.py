@@ -0,0 +1,35 @@
+from src.phrase_index import PhraseIndex
+from src.server import Server
+
+
+def test_complete_next_word_given_previous():
+    # The last partial token is completed from words that followed the previous ones
+    index = PhraseIndex()
+    for phrase in ['new york city'] * 3 + ['new york times'] * 2 + ['new jersey', 'the times']:
+        index.record(phrase)
+    assert index.complete('new york ', num_results=3) == ['new york city', 'new york times', 'new york new']
+    assert index.complete('new york t') == ['new york times', 'new york the']
+    assert index.complete('new j') == ['new jersey']
+    assert index.complete('old ti') == ['old times']
+    assert index.complete('') == []
+
+
+def test_words_are_shared_between_phrases():
+    # Distinct sentences over the same words add no trie nodes
+    index = PhraseIndex()
+    index.record('time machine is here')
+    node_count = index.node_count
+    index.record('here is time machine')
+    index.record('machine time is here')
+    assert index.node_count == node_count
+    assert len(index) == 4
+
+
+def test_server_token_phrases():
+    # Multi-word searches go to the phrase index, single words to the trie
+    app = Server(connect_to_db=False, testing=True, token_phrases=True)
+    app.search('this is a cool test')
+    assert app.search('this is a cool test') == ['this is a cool test']
+    assert app.node_count == 1
+    app.search('machine')
+    assert app.search('machine') == ['machine']
@@ -0,0 +1,27 @@
+import pytest
+from src.errors import ReturnResultValueLessThanOne
+from src.prefix_index import SortedPrefixIndex
+
+
+@pytest.fixture(name='index')
+def get_index():
+    counts = {'tea': 5, 'team': 7, 'ten': 3, 'to': 1, 'tear': 5, 'apple': 9, 'time machine': 2}
+    return SortedPrefixIndex(counts, num_res_return=3)
+
+
+def test_search_prefix_top_results(index):
+    # Results are restricted to the prefix range, highest count first, ties in lexicographic order
+    assert index.search('te') == ['team', 'tea', 'tear']
+    assert index.search('tea') == ['team', 'tea', 'tear']
+    assert index.search('Time  ma') == ['time machine']
+    assert index.search('x') == []
+    assert index.search(' ') == []
+
+
+def test_top_results(index):
+    assert index.top_results(2) == ['apple', 'team']
+
+
+def test_num_res_return_less_than_one(index):
+    with pytest.raises(ReturnResultValueLessThanOne):
+        index.num_res_return = 0
@@ -0,0 +1,25 @@
+from iomanagers.memory_redis import InMemoryRedis
+from iomanagers.redis_manager import RedisManager
+
+
+def test_cache_round_trip_with_in_memory_redis():
+    client = InMemoryRedis()
+    mgr = RedisManager(client=client)
+    assert mgr.get_search_results('tea') == []
+    mgr.cache_search_results('tea', ['tea', 'team'])
+    assert mgr.get_search_results('tea') == ['tea', 'team']
+    assert client.info('stats') == {'keyspace_hits': 1, 'keyspace_misses': 1}
+
+
+def test_search_history_is_bounded():
+    mgr = RedisManager(client=InMemoryRedis())
+    for i in range(15):
+        mgr.cache_search_history(str(i))
+    assert mgr.get_search_history() == [str(i) for i in range(14, 4, -1)]
+
+
+def test_caching_twice_does_not_duplicate_results():
+    mgr = RedisManager(client=InMemoryRedis())
+    mgr.cache_search_results('tea', ['tea', 'team'])
+    mgr.cache_search_results('tea', ['tea', 'team'])
+    assert mgr.get_search_results('tea') == ['tea', 'team']
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def search(term):
+        calls.append(term)
+        release.wait()
+        return [term]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(flight.do, 'tea', search, 'tea')
+        # the leader is computing, every later call for the term waits for it
+        while not calls:
+            pass
+        waiters = [executor.submit(flight.do, 'tea', search, 'tea') for _ in range(7)]
+        release.set()
+        results = [future.result(timeout=10) for future in [leader] + waiters]
+    assert calls == ['tea']
+    assert all(result is results[0] for result in results)
+    assert len(flight) == 0
+
+
+def test_error_is_raised_in_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def search(term):
+        calls.append(term)
+        release.wait()
+        raise KeyError(term)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(flight.do, 'tea', search, 'tea')
+        while not calls:
+            pass
+        waiters = [executor.submit(flight.do, 'tea', search, 'tea') for _ in range(7)]
+        # let the waiters block on the leader's call before it fails
+        time.sleep(0.1)
+        release.set()
+        with pytest.raises(KeyError) as error:
+            leader.result(timeout=10)
+        for future in waiters:
+            with pytest.raises(KeyError) as waiter_error:
+                future.result(timeout=10)
+            assert waiter_error.value is error.value
+    assert calls == ['tea']
+    assert len(flight) == 0
+
+
+def test_async_calls_share_one_computation():
+    async def run():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def search(term):
+            calls.append(term)
+            await asyncio.sleep(0.01)
+            return [term]
+
+        results = await asyncio.gather(*(flight.do('tea', search, 'tea') for _ in range(5)))
+        return calls, results
+
+    calls, results = asyncio.run(run())
+    assert calls == ['tea']
+    assert results == [['tea']] * 5
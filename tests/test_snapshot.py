@@ -0,0 +1,43 @@
+import multiprocessing
+
+import pytest
+from src.server import Server
+from src.snapshot import TrieSnapshot
+
+
+def _search_in_worker(file, term, queue):
+    with TrieSnapshot(file) as frozen:
+        queue.put(frozen.search(term))
+
+
+@pytest.fixture(name='frozen')
+def get_frozen(tmp_path):
+    app = Server(connect_to_db=False, testing=True)
+    app._record_phrases(['team'] * 3 + ['tea'] * 2 + ['ten', 'to', 'time machine'])
+    app.update_top_results()
+    app.delete_many(['to'])
+    file = str(tmp_path / 'trie.snapshot')
+    app.freeze(file)
+    frozen = TrieSnapshot(file, num_res_return=2)
+    yield frozen
+    frozen.close()
+
+
+def test_snapshot_read_path(frozen):
+    # The snapshot answers prefix searches like the trie it was frozen from
+    assert len(frozen) == 18
+    assert frozen.search('te') == ['team', 'tea']
+    assert frozen.search('Time  M') == ['time machine']
+    assert frozen.search('to') == []
+    assert frozen.search('x') == []
+    assert frozen.top_results(4) == ['team', 'tea', 'ten', 'time machine']
+    assert not frozen.edge_child.flags.writeable
+
+
+def test_snapshot_shared_with_worker(frozen, tmp_path):
+    queue = multiprocessing.get_context('spawn').Queue()
+    worker = multiprocessing.get_context('spawn').Process(
+        target=_search_in_worker, args=(str(tmp_path / 'trie.snapshot'), 'tea', queue))
+    worker.start()
+    assert queue.get(timeout=60) == ['team', 'tea']
+    worker.join()